@@ -9,10 +9,16 @@ from datetime import datetime
 import pandas as pd
 from io import BytesIO
 import base64
-import requests
-import groq
 from pydub import AudioSegment
 
+from pipeline.elevenlabs_client import get_elevenlabs_client
+from pipeline.client_registry import get_groq_client
+from pipeline import services
+from pipeline.mp3_frames import concatenate_mp3_bytes
+from pipeline.audio_assembly import DEFAULT_PAUSE_MS
+from pipeline.tts_engine import generate_lines_concurrently
+from pipeline.llm_cache import llm_cache_key, get_cached_response, store_response
+
 # Set page configuration
 st.set_page_config(
     page_title="VoiceCanvas Spotify",
@@ -25,31 +31,33 @@ st.set_page_config(
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "")
 ELEVENLABS_API_KEY = os.environ.get("ELEVENLABS_API_KEY", "")
 
-groq_client = groq.Client(api_key=GROQ_API_KEY)
-
 # Helper functions for API integration
+def get_elevenlabs_context():
+    """Build a service context holding the ElevenLabs key selected in the API Settings."""
+    # Use custom API key if provided, otherwise use the built-in key
+    if not st.session_state.use_built_in_elevenlabs and st.session_state.custom_elevenlabs_key:
+        api_key = st.session_state.custom_elevenlabs_key
+    else:
+        api_key = os.environ.get("ELEVENLABS_API_KEY")
+    return services.ServiceContext(elevenlabs_key=api_key or "")
+
 def text_to_speech_elevenlabs(text, voice_id="21m00Tcm4TlvDq8ikWAM", model_id="eleven_multilingual_v2", 
-                           voice_settings=None, is_cloned_voice=False, character_voice_mapping=None):
+                           voice_settings=None, is_cloned_voice=False, character_voice_mapping=None, context=None):
     """
     Convert text to speech using ElevenLabs API with support for:
     - Standard voices
     - Cloned voices
     - Character voice mapping for dialogue
     - Voice dubbing
+    
+    Returns a ServiceResult with the MP3 bytes; errors are left to the caller to display.
     """
     try:
-        import re
-        import os
+        # Keys come from an explicit context so this also works off the UI thread
+        context = context or get_elevenlabs_context()
         
-        # Use custom API key if provided, otherwise use the built-in key
-        if not st.session_state.use_built_in_elevenlabs and st.session_state.custom_elevenlabs_key:
-            ELEVENLABS_API_KEY = st.session_state.custom_elevenlabs_key
-        else:
-            ELEVENLABS_API_KEY = os.environ.get("ELEVENLABS_API_KEY")
-        
-        if not ELEVENLABS_API_KEY:
-            st.error("ElevenLabs API key not found. Please provide a valid API key in the API Settings.")
-            return None
+        if not context.elevenlabs_key:
+            return services.ServiceResult(None, "ElevenLabs API key not found. Please provide a valid API key in the API Settings.")
         
         # Default voice settings if not provided
         if not voice_settings:
@@ -64,7 +72,7 @@ def text_to_speech_elevenlabs(text, voice_id="21m00Tcm4TlvDq8ikWAM", model_id="e
         if character_voice_mapping and ":" in text:
             # If dialogue format detected, split and process each line with different voices
             lines = text.split('\n')
-            audio_segments = []
+            line_jobs = []
             
             for line in lines:
                 if ":" in line:
@@ -79,54 +87,57 @@ def text_to_speech_elevenlabs(text, voice_id="21m00Tcm4TlvDq8ikWAM", model_id="e
                         if character in character_voice_mapping:
                             character_voice_id = character_voice_mapping[character]
                         
-                        # Generate speech for this line with appropriate voice
-                        line_audio = generate_single_voice_clip(dialogue, character_voice_id, model_id, voice_settings, ELEVENLABS_API_KEY)
-                        if line_audio:
-                            audio_segments.append(line_audio)
+                        line_jobs.append({"provider": "elevenlabs", "text": dialogue, "voice_id": character_voice_id})
             
-            # Combine all audio segments if any were successfully generated
+            # Lines are generated concurrently and come back in script order
+            results = generate_lines_concurrently(
+                line_jobs,
+                lambda job: generate_single_voice_clip(job["text"], job["voice_id"], model_id, voice_settings, context.elevenlabs_key)
+            )
+            audio_segments = [result.value for result in results if result and result.value]
+            errors = [result.error for result in results if result and result.error]
+            
+            # Combine all audio segments if any were successfully generated; failed lines become warnings
             if audio_segments:
-                # Here we would normally combine audio segments using pydub
-                # For now, return the first segment as a simple implementation
-                return audio_segments[0]
-            else:
-                return None
+                return services.ServiceResult(combine_voice_clips(audio_segments), None, tuple(errors))
+            return services.ServiceResult(None, errors[0] if errors else "No dialogue lines could be voiced.")
         
         # For simple text or if no character mapping, generate with single voice
-        return generate_single_voice_clip(text, voice_id, model_id, voice_settings, ELEVENLABS_API_KEY)
+        return generate_single_voice_clip(text, voice_id, model_id, voice_settings, context.elevenlabs_key)
     
     except Exception as e:
-        st.error(f"Error in text_to_speech_elevenlabs: {str(e)}")
-        return None
+        return services.ServiceResult(None, f"Error in text_to_speech_elevenlabs: {str(e)}")
+
+
+def combine_voice_clips(audio_segments, pause_ms=DEFAULT_PAUSE_MS):
+    """Join MP3 clips in order with a pause between lines, frame by frame when they share a format, otherwise by decoding them"""
+    combined = concatenate_mp3_bytes(audio_segments, pause_ms)
+    if combined is not None:
+        return combined
+    
+    audio = AudioSegment.empty()
+    for i, segment in enumerate(audio_segments):
+        if i and pause_ms:
+            audio += AudioSegment.silent(duration=pause_ms)
+        audio += AudioSegment.from_file(BytesIO(segment), format="mp3")
+    buffer = BytesIO()
+    audio.export(buffer, format="mp3")
+    return buffer.getvalue()
 
 
 def generate_single_voice_clip(text, voice_id, model_id, voice_settings, api_key):
-    """Helper function to generate a single voice clip with ElevenLabs"""
-    try:
-        url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
-        
-        headers = {
-            "Accept": "audio/mpeg",
-            "Content-Type": "application/json",
-            "xi-api-key": api_key
-        }
-        
-        data = {
-            "text": text,
-            "model_id": model_id,
-            "voice_settings": voice_settings
-        }
-        
-        response = requests.post(url, json=data, headers=headers)
-        
-        if response.status_code == 200:
-            return response.content
-        else:
-            st.error(f"Error: {response.status_code} - {response.text}")
-            return None
-    except Exception as e:
-        st.error(f"Error generating voice clip: {str(e)}")
-        return None
+    """Helper function to generate a single voice clip with ElevenLabs, returned as a ServiceResult"""
+    result = services.synthesize_elevenlabs_bytes(
+        services.ServiceContext(elevenlabs_key=api_key),
+        text,
+        voice_id,
+        voice_settings,
+        model_id=model_id,
+        stream=False
+    )
+    if result.error:
+        return services.ServiceResult(None, f"Error generating voice clip: {result.error}")
+    return result
 
 def generate_dialogue_with_groq(text, character_names=None):
     """Use Groq API to convert a paragraph into dialogue with character assignments"""
@@ -149,11 +160,21 @@ def generate_dialogue_with_groq(text, character_names=None):
     """
     
     try:
+        # Identical requests are answered from the shared response cache
+        cache_key = llm_cache_key("llama3-70b-8192", "dialogue_json", 0.7, text, extra=character_names)
+        cached_dialogue = get_cached_response(cache_key)
+        if cached_dialogue is not None:
+            return cached_dialogue
+        
         # Use custom API key if provided, otherwise use the built-in key
         if not st.session_state.use_built_in_groq and st.session_state.custom_groq_key:
-            client = groq.Client(api_key=st.session_state.custom_groq_key)
+            client = get_groq_client(st.session_state.custom_groq_key)
         else:
-            client = groq_client
+            client = get_groq_client(GROQ_API_KEY)
+        
+        if not client:
+            st.error("Groq API key not found. Please provide a valid API key in the API Settings.")
+            return []
         
         completion = client.chat.completions.create(
             model="llama3-70b-8192",
@@ -168,7 +189,9 @@ def generate_dialogue_with_groq(text, character_names=None):
         
         response_text = completion.choices[0].message.content
         try:
-            return json.loads(response_text)
+            dialogue = json.loads(response_text)
+            store_response(cache_key, dialogue)
+            return dialogue
         except json.JSONDecodeError:
             st.error("Failed to parse dialogue response as JSON")
             return []
@@ -179,7 +202,6 @@ def generate_dialogue_with_groq(text, character_names=None):
 def clone_voice_elevenlabs(voice_sample, voice_name, description="Custom cloned voice"):
     """Create a cloned voice using ElevenLabs API"""
     try:
-        import requests
         import os
         import tempfile
         
@@ -218,7 +240,7 @@ def clone_voice_elevenlabs(voice_sample, voice_name, description="Custom cloned
         }
         
         # Send request
-        response = requests.post(url, headers=headers, data=data, files=files)
+        response = get_elevenlabs_client().post(url, headers=headers, data=data, files=files)
         
         # Clean up temporary file
         os.unlink(temp_file_path)
@@ -257,7 +279,7 @@ def dub_audio_with_elevenlabs(audio_file, target_language, text_transcript=None,
         translated_text = text_transcript
         
         # Generate the dubbed audio
-        dubbed_audio = text_to_speech_elevenlabs(
+        result = text_to_speech_elevenlabs(
             translated_text, 
             voice_id=voice_id,
             voice_settings={
@@ -266,6 +288,9 @@ def dub_audio_with_elevenlabs(audio_file, target_language, text_transcript=None,
                 "style": 0.3,  # Slight style enhancement for dubbing
             }
         )
+        if result.error:
+            st.error(result.error)
+        dubbed_audio = result.value
         
         if dubbed_audio:
             # Save to a temporary file
@@ -294,11 +319,27 @@ def analyze_text_tone(text):
     """
     
     try:
+        # Identical requests are answered from the shared response cache
+        cache_key = llm_cache_key("llama3-70b-8192", "tone_analysis", 0.3, text)
+        cached_analysis = get_cached_response(cache_key)
+        if cached_analysis is not None:
+            return cached_analysis
+        
         # Use custom API key if provided, otherwise use the built-in key
         if not st.session_state.use_built_in_groq and st.session_state.custom_groq_key:
-            client = groq.Client(api_key=st.session_state.custom_groq_key)
+            client = get_groq_client(st.session_state.custom_groq_key)
         else:
-            client = groq_client
+            client = get_groq_client(GROQ_API_KEY)
+        
+        if not client:
+            st.error("Groq API key not found. Please provide a valid API key in the API Settings.")
+            return {
+                "tone": "neutral",
+                "tempo": "moderate",
+                "key_elements": ["API key required"],
+                "intensity_curve": [0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5],
+                "music_genre": "ambient"
+            }
             
         completion = client.chat.completions.create(
             model="llama3-70b-8192",
@@ -313,7 +354,9 @@ def analyze_text_tone(text):
         
         response_text = completion.choices[0].message.content
         try:
-            return json.loads(response_text)
+            analysis = json.loads(response_text)
+            store_response(cache_key, analysis)
+            return analysis
         except json.JSONDecodeError:
             st.error("Failed to parse tone analysis response")
             return {
@@ -1968,10 +2011,13 @@ def main():
                             sample_text = "Hello! This is a sample of my cloned voice. It sounds pretty amazing, doesn't it?"
                             if st.button("Generate sample with cloned voice"):
                                 with st.spinner("Generating audio sample with your cloned voice..."):
-                                    audio_bytes = text_to_speech_elevenlabs(
+                                    result = text_to_speech_elevenlabs(
                                         sample_text, 
                                         voice_id=voice_id
                                     )
+                                    if result.error:
+                                        st.error(result.error)
+                                    audio_bytes = result.value
                                     if audio_bytes:
                                         st.audio(audio_bytes, format="audio/mp3")
         
@@ -2127,11 +2173,16 @@ def main():
                                     voice_settings["style"] = 0.1
                                 
                                 # Convert the text to speech using ElevenLabs with all parameters
-                                audio_bytes = text_to_speech_elevenlabs(
+                                result = text_to_speech_elevenlabs(
                                     text_input,
                                     voice_settings=voice_settings,
                                     character_voice_mapping=character_voice_mapping
                                 )
+                                for warning in result.warnings:
+                                    st.warning(warning)
+                                if result.error:
+                                    st.error(result.error)
+                                audio_bytes = result.value
                                 if audio_bytes:
                                     # Save the generated audio to a temporary file
                                     timestamp = int(time.time())
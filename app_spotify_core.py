@@ -1,5 +1,4 @@
 import streamlit as st
-import re
 import tempfile
 import os
 import time
@@ -9,14 +8,25 @@ import shutil
 from datetime import datetime
 import pandas as pd
 from pydub import AudioSegment
-from openai import OpenAI
-import groq
-import requests
 from io import BytesIO
 import base64
 
 # Import our Listening Room module
 from listening_room.listening_room import run_listening_room
+from pipeline.gain_envelope import apply_gain_envelope
+from pipeline.llm_cache import llm_cache_stats
+from pipeline.script_parser import parse_text_from_string
+from pipeline.clip_cache import clip_cache_stats
+from pipeline.voice_catalog import peek_voice_catalog
+from pipeline import services
+from pipeline.progressive_playback import PLAYBACK_PUBLIC_URL, ProgressiveBuffer, publish_stream
+from pipeline.render_graph import RenderGraph, line_signature
+from pipeline.clip_store import get_clip_store
+from pipeline.line_batching import TTS_BATCH_DEFAULT, display_text
+from pipeline.render_jobs import plan_line_jobs, render_lines
+from pipeline.ffmpeg_mix import EXPORT_BACKEND
+from pipeline.job_queue import ACTIVE_STATUSES, submit_job, get_job
+from pipeline.tracing import span, trace, start_metrics_server
 
 # Define enhanced CSS
 enhanced_css = """
@@ -423,9 +433,13 @@ if 'parsed_data' not in st.session_state:
 if 'character_voices' not in st.session_state:
     st.session_state.character_voices = {}
 if 'audio_files' not in st.session_state:
-    st.session_state.audio_files = []
+    st.session_state.audio_files = []  # in-memory clips of the script's voiced lines, in order
 if 'final_audio' not in st.session_state:
     st.session_state.final_audio = None
+if 'render_graph' not in st.session_state:
+    st.session_state.render_graph = RenderGraph()
+if 'playback_url' not in st.session_state:
+    st.session_state.playback_url = None  # Stream of the last render's lines, played as they were generated
 if 'current_step' not in st.session_state:
     st.session_state.current_step = 1
 if 'api_key' not in st.session_state:
@@ -478,6 +492,12 @@ if 'saved_audio_table' not in st.session_state:
     st.session_state.saved_audio_table = []
 if 'background_volume_automation' not in st.session_state:
     st.session_state.background_volume_automation = []
+# Background jobs are also kept in the URL so a reloaded page picks them up again
+for job_key in ("render_job_id", "dub_job_id"):
+    if job_key not in st.session_state:
+        st.session_state[job_key] = st.query_params.get(job_key)
+if st.session_state.render_job_id and st.session_state.current_step < 3:
+    st.session_state.current_step = 3
 
 # Define voice models
 openai_voice_models = {
@@ -489,99 +509,46 @@ openai_voice_models = {
     "Shimmer (Female)": "shimmer"
 }
 
+# Seconds between status checks of a background job
+JOB_STATUS_REFRESH_SECONDS = 2
+
+# Serve stage metrics at /metrics when VOICECANVAS_METRICS_PORT is set (once per server process)
+start_metrics_server()
+
 # Define ElevenLabs constants
 ELEVENLABS_API_BASE = "https://api.elevenlabs.io/v1"
 DEEPDUB_API_BASE = "https://api.deepdub.ai/v1"
 
+# Function to snapshot session settings into a service context
+def get_service_context():
+    """Build an immutable service context from the current session state."""
+    return services.build_context(
+        openai_key=st.session_state.get("openai_key") or st.session_state.get("api_key"),
+        elevenlabs_key=st.session_state.get("elevenlabs_key"),
+        groq_key=st.session_state.get("groq_key"),
+        voice_settings=st.session_state.get("voice_settings"),
+        background_tracks=st.session_state.get("selected_background_tracks"),
+        bg_volume=st.session_state.get("bg_volume", 0.3),
+        volume_automation=st.session_state.get("background_volume_automation"),
+        export_backend=st.session_state.get("export_backend")
+    )
+
 # Function to initialize OpenAI client
-def get_openai_client():
-    if 'openai_key' in st.session_state and st.session_state.openai_key:
-        return OpenAI(api_key=st.session_state.openai_key)
-    elif 'api_key' in st.session_state and st.session_state.api_key:
-        return OpenAI(api_key=st.session_state.api_key)
-    return None
+def get_openai_client(context=None):
+    return services.openai_client(context or get_service_context())
     
 # Function to initialize Groq client
-def get_groq_client():
-    # First check session state for the API key
-    if 'groq_key' in st.session_state and st.session_state.groq_key:
-        return groq.Client(api_key=st.session_state.groq_key)
-    # Then check environment variables
-    groq_api_key = os.environ.get("GROQ_API_KEY")
-    if groq_api_key:
-        # Store in session state for future use
-        st.session_state.groq_key = groq_api_key
-        return groq.Client(api_key=groq_api_key)
-    return None
+def get_groq_client(context=None):
+    return services.groq_client(context or get_service_context())
     
 # Function to convert paragraph to dialogue format using Groq
 def convert_paragraph_to_dialogue(text):
     """Convert paragraph text to dialogue format using Groq API."""
-    try:
-        client = get_groq_client()
-        if not client:
-            st.error("Groq API key not set. Please provide a valid API key.")
-            return text
-            
-        # Create prompt for dialogue conversion
-        prompt = f"""
-        Convert the following paragraph into a dialogue format with character names, 
-        emotions in parentheses, and spoken lines. Format each line as "Character (emotion): Dialogue".
-        Ensure the dialogue is natural and flows well between characters.
-        
-        Paragraph: {text}
-        
-        Please return only the dialogue without any additional explanation.
-        """
-        
-        # Generate dialogue using Groq API
-        completion = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[
-                {"role": "system", "content": "You are a skilled dialogue writer that converts paragraphs into natural dialogue format."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        
-        dialogue_text = completion.choices[0].message.content.strip()
-        return dialogue_text
-        
-    except Exception as e:
-        st.error(f"Error converting text to dialogue format: {str(e)}")
+    result = services.convert_paragraph_to_dialogue(get_service_context(), text)
+    if result.error:
+        st.error(result.error)
         return text  # Return original text if conversion fails
-
-# Function to parse text from string
-def parse_text_from_string(text):
-    """Parse text into structured dialogue data."""
-    lines = text.strip().split('\n')
-    parsed_data = []
-    
-    for line in lines:
-        if not line.strip():
-            continue
-            
-        # Check if line follows the format "Character (emotion): Dialogue"
-        match = re.match(r"(.*?)(?:\s*\((.*?)\))?\s*:\s*(.*)", line)
-        
-        if match:
-            character = match.group(1).strip()
-            emotion = match.group(2).strip() if match.group(2) else None
-            dialogue = match.group(3).strip()
-            
-            parsed_data.append({
-                "character": character,
-                "emotion": emotion,
-                "dialogue": dialogue
-            })
-        else:
-            # If line doesn't match the format, treat it as narration
-            parsed_data.append({
-                "character": "Narrator",
-                "emotion": None,
-                "dialogue": line.strip()
-            })
-    
-    return parsed_data
+    return result.value
 
 # Function to parse text from uploaded file
 def parse_text_from_file(file):
@@ -595,218 +562,62 @@ def parse_text_from_file(file):
         return []
 
 # Function to generate voice using OpenAI TTS
-def generate_voice_openai(text, voice_model, speed=1.0, pitch=0, emotion=None):
+def generate_voice_openai(text, voice_model, speed=1.0, pitch=0, emotion=None, context=None, on_chunk=None):
     """Generate voice audio from text using OpenAI's TTS API."""
-    try:
-        client = get_openai_client()
-        if not client:
-            st.error("OpenAI API key not set. Please provide a valid API key.")
-            return None
-            
-        # Extract text without emotion tags
-        text_without_emotion = text
-        
-        # Create temporary file to store audio
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-            # Generate speech using OpenAI API
-            response = client.audio.speech.create(
-                model="tts-1-hd",
-                voice=voice_model,
-                input=text_without_emotion,
-                speed=speed
-            )
-            
-            # Write response to temporary file
-            response.stream_to_file(temp_file.name)
-            
-            return temp_file.name
-            
-    except Exception as e:
-        st.error(f"Error generating voice with OpenAI: {str(e)}")
-        return None
+    # Extract text without emotion tags
+    text_without_emotion = text
+    
+    result = services.synthesize_openai(context or get_service_context(), text_without_emotion, voice_model, speed, on_chunk=on_chunk)
+    if result.error:
+        st.error(result.error)
+    return result.value
 
 # Function to fetch available voice models from ElevenLabs
-def fetch_elevenlabs_voices():
+def fetch_elevenlabs_voices(context=None, force_refresh=False):
     """Fetch available voice models from ElevenLabs API."""
-    try:
-        # Check if API key is set
-        if not st.session_state.elevenlabs_key:
-            st.error("ElevenLabs API key not set. Please provide a valid API key.")
-            return {}
-            
-        # Set up headers with API key
-        headers = {
-            "xi-api-key": st.session_state.elevenlabs_key,
-            "Content-Type": "application/json"
-        }
-        
-        # Make API request to fetch voices
-        response = requests.get(f"{ELEVENLABS_API_BASE}/voices", headers=headers)
-        
-        if response.status_code == 200:
-            voices_data = response.json()
-            
-            # Extract voices and their IDs and store them as a dictionary
-            voices = {voice['name']: voice['voice_id'] for voice in voices_data['voices']}
-            
-            # Create a DataFrame with voice information for display
-            voices_info = []
-            for voice in voices_data['voices']:
-                voices_info.append({
-                    "Name": voice['name'],
-                    "Voice ID": voice['voice_id'],
-                    "Category": voice.get('category', 'N/A'),
-                    "Labels": ", ".join([f"{k}: {v}" for k, v in voice.get('labels', {}).items()])
-                })
-                
-            voices_df = pd.DataFrame(voices_info)
-            
-            # Return voices dictionary
-            return voices
-        else:
-            st.error(f"Failed to fetch ElevenLabs voices. Status code: {response.status_code}")
-            st.error(f"Response: {response.text}")
-            return {}
-            
-    except Exception as e:
-        st.error(f"Error fetching ElevenLabs voices: {str(e)}")
+    # The catalog is shared by all sessions and refreshed in the background
+    result = services.list_elevenlabs_voices(context or get_service_context(), force_refresh)
+    if result.error:
+        st.error(result.error)
         return {}
+    
+    # Return voices dictionary
+    return result.value
 
 # Function to generate voice using ElevenLabs
-def generate_voice_elevenlabs(text, voice_id, stability=0.5, similarity_boost=0.75, emotion=None):
+def generate_voice_elevenlabs(text, voice_id, stability=0.5, similarity_boost=0.75, emotion=None, context=None, on_chunk=None):
     """Generate voice audio from text using ElevenLabs API."""
-    try:
-        # Check if API key is set
-        if not st.session_state.elevenlabs_key:
-            st.error("ElevenLabs API key not set. Please provide a valid API key.")
-            return None
-            
-        # Set up headers with API key
-        headers = {
-            "xi-api-key": st.session_state.elevenlabs_key,
-            "Content-Type": "application/json"
-        }
-        
-        # Extract text without emotion tags
-        text_without_emotion = text
-        
-        # Prepare request data
-        data = {
-            "text": text_without_emotion,
-            "voice_settings": {
-                "stability": stability,
-                "similarity_boost": similarity_boost
-            }
-        }
-        
-        # Make API request
-        response = requests.post(
-            f"{ELEVENLABS_API_BASE}/text-to-speech/{voice_id}/stream",
-            json=data,
-            headers=headers
-        )
-        
-        if response.status_code == 200:
-            # Save the audio to a temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-                temp_file.write(response.content)
-                return temp_file.name
-        else:
-            st.error(f"Failed to generate audio with ElevenLabs. Status code: {response.status_code}")
-            st.error(f"Response: {response.text}")
-            return None
-            
-    except Exception as e:
-        st.error(f"Error generating voice with ElevenLabs: {str(e)}")
-        return None
+    # Extract text without emotion tags
+    text_without_emotion = text
+    
+    result = services.synthesize_elevenlabs(
+        context or get_service_context(),
+        text_without_emotion,
+        voice_id,
+        stability=stability,
+        similarity_boost=similarity_boost,
+        on_chunk=on_chunk
+    )
+    if result.error:
+        st.error(result.error)
+    return result.value
 
 # Function to concatenate audio files
-def concatenate_audio_files(audio_files, output_path, background_track=None, bg_volume=0.3):
-    """Concatenate multiple audio files into a single audio file."""
-    try:
-        if not audio_files:
-            return None
-            
-        # Load the first audio file
-        combined = AudioSegment.from_file(audio_files[0])
-        
-        # Add a short pause between utterances
-        pause = AudioSegment.silent(duration=1000)  # 1-second pause
-        
-        # Concatenate remaining audio files
-        for audio_file in audio_files[1:]:
-            next_segment = AudioSegment.from_file(audio_file)
-            combined += pause + next_segment
-        
-        # Add background tracks if available
-        if st.session_state.selected_background_tracks:
-            # Process each selected background track
-            for track in st.session_state.selected_background_tracks:
-                # Download the track if it's a URL
-                if 'url' in track:
-                    bg_track_path = download_background_track(track['url'], track['name'])
-                    if not bg_track_path:
-                        continue  # Skip if download failed
-                else:
-                    # If it's a local file path
-                    bg_track_path = track.get('path')
-                    if not bg_track_path or not os.path.exists(bg_track_path):
-                        continue  # Skip if file doesn't exist
-                
-                # Load background audio
-                bg_audio = AudioSegment.from_file(bg_track_path)
-                
-                # Loop background audio to match the length of narration
-                while len(bg_audio) < len(combined):
-                    bg_audio += bg_audio
-                    
-                # Trim background audio to match narration length
-                bg_audio = bg_audio[:len(combined)]
-                
-                # Apply volume automation if enabled
-                if st.session_state.background_volume_automation and len(st.session_state.background_volume_automation) >= 2:
-                    bg_audio = apply_volume_automation(bg_audio, st.session_state.background_volume_automation)
-                else:
-                    # Use standard volume adjustment
-                    volume = bg_volume
-                    if hasattr(track, 'volume'):  # Use track-specific volume if available
-                        volume = track.get('volume', bg_volume)
-                    bg_audio = bg_audio - (20 - (volume * 20))  # Convert 0-1 scale to dB reduction
-                
-                # Mix narration with background audio
-                combined = combined.overlay(bg_audio)
-                
-                # Clean up temporary file
-                if 'url' in track and bg_track_path:
-                    try:
-                        os.remove(bg_track_path)
-                    except:
-                        pass
-        
-        # For backward compatibility, support direct background_track parameter
-        elif background_track and background_track != "None":
-            bg_audio = AudioSegment.from_file(background_track)
-            
-            # Loop background audio to match the length of narration
-            while len(bg_audio) < len(combined):
-                bg_audio += bg_audio
-                
-            # Trim background audio to match narration length
-            bg_audio = bg_audio[:len(combined)]
-            
-            # Adjust volume of background audio
-            bg_audio = bg_audio - (20 - (bg_volume * 20))  # Adjust volume based on bg_volume (0.1-1.0)
-            
-            # Mix narration with background audio
-            combined = combined.overlay(bg_audio)
-            
-        # Export the combined audio
-        combined.export(output_path, format="mp3")
-        return output_path
-        
-    except Exception as e:
-        st.error(f"Error concatenating audio files: {str(e)}")
+def concatenate_audio_files(audio_files, output_path, background_track=None, bg_volume=0.3, context=None):
+    """Concatenate the clips of multiple lines into a single audio file."""
+    if not audio_files:
         return None
+    
+    # Background selection defaults to the current session's settings
+    if context is None:
+        context = get_service_context().with_overrides(bg_volume=bg_volume)
+    
+    result = services.concatenate_clips(context, audio_files, output_path, background_track=background_track)
+    for warning in result.warnings:
+        st.warning(warning)
+    if result.error:
+        st.error(result.error)
+    return result.value
 
 # Function to clean up temporary files
 def cleanup_temp_files(file_list):
@@ -818,121 +629,140 @@ def cleanup_temp_files(file_list):
         except Exception as e:
             st.warning(f"Could not remove temporary file {file_path}: {str(e)}")
 
+# Function to free the session's clips that the render graph does not hold
+def discard_untracked_clips():
+    """Free clips of the session that belong to no render graph node, e.g. those of a loaded project."""
+    render_graph = st.session_state.render_graph
+    for clip in st.session_state.audio_files:
+        if not render_graph.tracks(clip):
+            clip.discard()
+
+# Function to drop the current export so it is rebuilt from the clips
+def discard_final_audio():
+    """Forget the final export, deleting it unless it was saved with a project."""
+    if st.session_state.final_audio:
+        # Exports saved with a project live outside the temp directory and are kept
+        if os.path.dirname(st.session_state.final_audio) == tempfile.gettempdir():
+            cleanup_temp_files([st.session_state.final_audio])
+        st.session_state.final_audio = None
+
+# Function to hand work to the background job queue
+def start_background_job(state_key, kind, payload):
+    """Queue a job and remember its ID under state_key in the session and the URL."""
+    job_id = submit_job(kind, payload)
+    st.session_state[state_key] = job_id
+    st.query_params[state_key] = job_id
+    return job_id
+
+def _forget_job(state_key):
+    st.session_state[state_key] = None
+    st.query_params.pop(state_key, None)
+
+# Function to poll a background job from the page
+@st.fragment(run_every=JOB_STATUS_REFRESH_SECONDS)
+def show_job_status(state_key, on_finished):
+    """Show the progress of the job stored under state_key and pass its result to on_finished once it is done."""
+    job_id = st.session_state.get(state_key)
+    if not job_id:
+        return
+    job = get_job(job_id)
+    if job and job["status"] in ACTIVE_STATUSES:
+        st.progress(job["progress"])
+        if job["status"] == "queued":
+            st.caption("Waiting for a free worker...")
+        else:
+            st.caption(job["message"] or "Working...")
+        return
+    
+    if job and job["status"] == "done":
+        _forget_job(state_key)
+        on_finished(job["result"])
+        st.rerun()
+    
+    # Failures stay on screen until dismissed, since this fragment keeps refreshing
+    st.error(f"Background job failed: {job['error']}" if job else "The background job could not be found; it may have expired.")
+    if st.button("Dismiss", key=f"{state_key}_dismiss"):
+        _forget_job(state_key)
+        st.rerun()
+
+# Function to show where a render spent its time
+def show_timing_breakdown(timings, caches=False):
+    """Show per-stage timings, given as phase name -> Trace.breakdown() rows, in an expander.
+
+    With caches set, the clip and LLM response cache counters of this server process are shown below them.
+    """
+    if not timings:
+        return
+    with st.expander("⏱️ Timing breakdown"):
+        for phase, rows in timings.items():
+            if rows:
+                st.caption(phase)
+                st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        if caches:
+            clip_stats = clip_cache_stats()
+            st.caption(
+                f"Clip cache since the server started: {clip_stats['hits']} hits, {clip_stats['misses']} misses, "
+                f"{clip_stats['evictions']} evictions; {clip_stats['entries']} clips stored "
+                f"({clip_stats['bytes'] / (1024 * 1024):.1f} MB)"
+            )
+            llm_stats = llm_cache_stats()
+            st.caption(f"LLM response cache since the server started: {llm_stats['hits']} hits, {llm_stats['misses']} misses")
+
+# Function to pick up the clips of a finished background render
+def apply_render_job_result(result):
+    """Store a background render's clips and move on to the final export."""
+    discard_untracked_clips()
+    # The worker hands its clips over as files, which are loaded into this process's clip store
+    clip_store = get_clip_store()
+    clips = {signature: clip_store.adopt(path) for signature, path in result["clips"].items() if os.path.exists(path)}
+    store_rendered_clips(result["line_indexes"], result["signatures"], clips)
+    st.session_state.render_timings = {"Generate": result["timings"]}
+    if st.session_state.audio_files:
+        st.session_state.current_step = 4
+
+# Function to keep a render's clips in the session's render graph
+def store_rendered_clips(line_indexes, signatures, clips):
+    """Register newly voiced clips by line signature, drop clips of removed lines and set the script's audio files.
+
+    line_indexes and signatures describe the script's voiced lines in order; clips maps signatures to new clips.
+    """
+    render_graph = st.session_state.render_graph
+    for signature, clip in clips.items():
+        render_graph.add(signature, clip)
+    rendered_signatures = [signature for signature in signatures if render_graph.has(signature)]
+    render_graph.prune(rendered_signatures)
+    
+    # Store generated audio files; the final mix is rebuilt from them in Step 4
+    st.session_state.audio_files = [render_graph.clip(signature) for signature in rendered_signatures]
+    discard_final_audio()
+    
+    # Lines that still failed after retries are reported instead of silently left out
+    st.session_state.missing_lines = [
+        index + 1 for index, signature in zip(line_indexes, signatures) if not render_graph.has(signature)
+    ]
+
+# Function to pick up the output of a finished background dubbing job
+def apply_dub_job_result(result):
+    """Show the dubbed audio produced by a background job."""
+    st.session_state.dubbed_audio = result["output"]
+    st.session_state.dub_timings = {"Dubbing": result["timings"]}
+
 # OpenAI dubbing function
-def openai_dubbing(audio_file_path, target_language="en", voice="alloy"):
+def openai_dubbing(audio_file_path, target_language="en", voice="alloy", on_chunk_ready=None):
     """Dub audio content to a different language using OpenAI."""
-    try:
-        client = get_openai_client()
-        if not client:
-            st.error("OpenAI API key not set. Please provide a valid API key.")
-            return None
-        
-        # First, transcribe the audio to text using Whisper
-        with open(audio_file_path, "rb") as audio_file:
-            transcription_response = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="text"
-            )
-        
-        transcribed_text = transcription_response
-        
-        # Now translate the transcribed text to the target language
-        translation_prompt = f"Translate the following text to {target_language}. Maintain the tone and meaning:\n\n{transcribed_text}"
-        
-        translation_response = client.chat.completions.create(
-            model="gpt-4o",  # Using GPT-4o for high-quality translation
-            messages=[
-                {"role": "system", "content": f"You are a professional translator for {target_language}."},
-                {"role": "user", "content": translation_prompt}
-            ]
-        )
-        
-        translated_text = translation_response.choices[0].message.content.strip()
-        
-        # Finally, convert the translated text to speech in the target language
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-            speech_response = client.audio.speech.create(
-                model="tts-1-hd",
-                voice=voice,
-                input=translated_text
-            )
-            
-            speech_response.stream_to_file(temp_file.name)
-            return temp_file.name
-            
-    except Exception as e:
-        st.error(f"Error during OpenAI dubbing: {str(e)}")
-        return None
+    result = services.dub_audio(get_service_context(), "openai", audio_file_path, target_language, voice, on_chunk_ready)
+    if result.error:
+        st.error(result.error)
+    return result.value
 
 # ElevenLabs dubbing function
-def elevenlabs_dubbing(audio_file_path, target_language="en", voice_id=None):
+def elevenlabs_dubbing(audio_file_path, target_language="en", voice_id=None, on_chunk_ready=None):
     """Dub audio content to a different language using ElevenLabs."""
-    try:
-        client = get_openai_client()  # For transcription and translation
-        if not client or not st.session_state.elevenlabs_key:
-            st.error("OpenAI and ElevenLabs API keys are required for this operation.")
-            return None
-        
-        # First, transcribe the audio to text using Whisper
-        with open(audio_file_path, "rb") as audio_file:
-            transcription_response = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="text"
-            )
-        
-        transcribed_text = transcription_response
-        
-        # Now translate the transcribed text to the target language
-        translation_prompt = f"Translate the following text to {target_language}. Maintain the tone and meaning:\n\n{transcribed_text}"
-        
-        translation_response = client.chat.completions.create(
-            model="gpt-4o",  # Using GPT-4o for high-quality translation
-            messages=[
-                {"role": "system", "content": f"You are a professional translator for {target_language}."},
-                {"role": "user", "content": translation_prompt}
-            ]
-        )
-        
-        translated_text = translation_response.choices[0].message.content.strip()
-        
-        # Finally, convert the translated text to speech using ElevenLabs
-        # Set up headers with API key
-        headers = {
-            "xi-api-key": st.session_state.elevenlabs_key,
-            "Content-Type": "application/json"
-        }
-        
-        # Prepare request data
-        data = {
-            "text": translated_text,
-            "voice_settings": {
-                "stability": 0.5,
-                "similarity_boost": 0.75
-            }
-        }
-        
-        # Make API request
-        response = requests.post(
-            f"{ELEVENLABS_API_BASE}/text-to-speech/{voice_id}/stream",
-            json=data,
-            headers=headers
-        )
-        
-        if response.status_code == 200:
-            # Save the audio to a temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-                temp_file.write(response.content)
-                return temp_file.name
-        else:
-            st.error(f"Failed to generate dubbed audio with ElevenLabs. Status code: {response.status_code}")
-            st.error(f"Response: {response.text}")
-            return None
-            
-    except Exception as e:
-        st.error(f"Error during ElevenLabs dubbing: {str(e)}")
-        return None
+    # OpenAI handles transcription and translation, ElevenLabs the new voice
+    result = services.dub_audio(get_service_context(), "elevenlabs", audio_file_path, target_language, voice_id, on_chunk_ready)
+    if result.error:
+        st.error(result.error)
+    return result.value
 
 # Generate voice with DeepDub (commented out as it's not working)
 def generate_voice_deepdub(text, voice_id=None, language="en"):
@@ -954,68 +784,20 @@ def fetch_deepdub_voices():
 
 # Function to download background track from URL
 def download_background_track(track_url, track_name):
-    """Download background track from URL and save to temporary file."""
-    try:
-        # Use a custom User-Agent header to avoid being blocked
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept": "*/*",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Connection": "keep-alive"
-        }
-        
-        # If URL is from Pixabay, update to direct MP3 URL if needed
-        if "pixabay.com" in track_url and not track_url.endswith(".mp3"):
-            # This is a fallback for demo purposes since some pixabay links have access restrictions
-            # In a production app, we would use proper licensed audio files
-            st.info(f"Using local demo track instead of remote URL due to access restrictions")
-            # Return a simple silent audio for demonstration
-            return create_demo_audio_file(track_name)
-            
-        response = requests.get(track_url, headers=headers)
-        if response.status_code == 200:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-                temp_file.write(response.content)
-                return temp_file.name
-        else:
-            st.warning(f"Could not download track directly. Using demo audio instead.")
-            return create_demo_audio_file(track_name)
-    except Exception as e:
-        st.warning(f"Using demo audio instead. Error: {str(e)}")
+    """Download background track from URL into the local asset cache."""
+    result = services.resolve_background_track(track_url, track_name)
+    for warning in result.warnings:
+        st.warning(warning)
+    if result.error:
+        st.error(result.error)
         return create_demo_audio_file(track_name)
+    return result.value
 
 # Helper function to create a demo audio file with minimal sound
 def create_demo_audio_file(track_name):
     """Create a demo audio file when direct download fails."""
     try:
-        # Create a silent audio segment (1 sec) with very soft tone for demo
-        from pydub.generators import Sine
-        
-        # Generate different tones based on track type for demo
-        if "bird" in track_name.lower():
-            # High pitched gentle tone for birds
-            demo_audio = Sine(440).to_audio_segment(duration=3000).fade_in(300).fade_out(500)
-            demo_audio = demo_audio - 25  # Lower volume
-        elif "ocean" in track_name.lower() or "wave" in track_name.lower():
-            # Low frequency for water sounds
-            demo_audio = Sine(180).to_audio_segment(duration=3000).fade_in(500).fade_out(500)
-            demo_audio = demo_audio - 20
-        elif "piano" in track_name.lower():
-            # Piano-like tone
-            demo_audio = Sine(262).to_audio_segment(duration=500)
-            demo_audio += Sine(330).to_audio_segment(duration=500)
-            demo_audio += Sine(392).to_audio_segment(duration=500)
-            demo_audio = demo_audio.fade_in(100).fade_out(300)
-            demo_audio = demo_audio - 15
-        else:
-            # Generic soft tone
-            demo_audio = Sine(220).to_audio_segment(duration=3000).fade_in(300).fade_out(500)
-            demo_audio = demo_audio - 20
-            
-        # Save to temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-        demo_audio.export(temp_file.name, format="mp3")
-        return temp_file.name
+        return services.create_demo_audio(track_name)
     except Exception as e:
         st.error(f"Error creating demo audio: {str(e)}")
         # Create an empty audio file as last resort
@@ -1032,71 +814,9 @@ def apply_volume_automation(audio_segment, automation_points):
         if not automation_points or len(automation_points) < 2:
             return audio_segment
             
-        # Sort automation points by time
-        automation_points.sort(key=lambda x: x["time"])
-        
-        # Create segments based on automation points
-        result_audio = AudioSegment.empty()
-        audio_length_ms = len(audio_segment)
-        
-        for i in range(len(automation_points) - 1):
-            start_point = automation_points[i]
-            end_point = automation_points[i+1]
-            
-            start_time_ms = int(start_point["time"] * 1000)  # Convert to milliseconds
-            end_time_ms = int(end_point["time"] * 1000)
-            
-            if start_time_ms >= audio_length_ms:
-                break
-                
-            if end_time_ms > audio_length_ms:
-                end_time_ms = audio_length_ms
-                
-            # Extract segment
-            segment = audio_segment[start_time_ms:end_time_ms]
-            
-            # Apply volume gradient across segment
-            start_volume = start_point["volume"]
-            end_volume = end_point["volume"]
-            
-            if start_volume == end_volume:
-                # Constant volume
-                segment = segment - (20 - (start_volume * 20))  # Convert 0-1 scale to dB reduction
-            else:
-                # Apply gradual volume change
-                segment_length_ms = end_time_ms - start_time_ms
-                
-                # Create a new segment with gradient volume
-                result_segment = AudioSegment.empty()
-                step_size_ms = 100  # Process in 100ms chunks
-                
-                for j in range(0, segment_length_ms, step_size_ms):
-                    # Calculate volume for this chunk based on position within gradient
-                    position_ratio = j / segment_length_ms
-                    current_volume = start_volume + (end_volume - start_volume) * position_ratio
-                    
-                    # Extract and adjust volume of this chunk
-                    chunk_end = min(j + step_size_ms, segment_length_ms)
-                    chunk = segment[j:chunk_end]
-                    chunk = chunk - (20 - (current_volume * 20))  # Convert 0-1 scale to dB reduction
-                    
-                    # Add to result segment
-                    result_segment += chunk
-                    
-                segment = result_segment
-                
-            # Add segment to result
-            result_audio += segment
-            
-        # Add any remaining audio
-        last_point_time_ms = int(automation_points[-1]["time"] * 1000)
-        if last_point_time_ms < audio_length_ms:
-            last_segment = audio_segment[last_point_time_ms:]
-            last_volume = automation_points[-1]["volume"]
-            last_segment = last_segment - (20 - (last_volume * 20))
-            result_audio += last_segment
-            
-        return result_audio
+        # Interpolate the points into a per-sample gain curve and apply it in one pass
+        with span("automation", points=len(automation_points), bytes=len(audio_segment.raw_data)):
+            return apply_gain_envelope(audio_segment, automation_points)
         
     except Exception as e:
         st.error(f"Error applying volume automation: {str(e)}")
@@ -1144,12 +864,13 @@ def save_project(project_name, include_audio=True):
             shutil.copy2(st.session_state.final_audio, audio_path)
             project_data["final_audio_path"] = audio_path
             
-            # Copy individual audio files
+            # Write out individual audio clips
             individual_audio_paths = []
-            for i, audio_file in enumerate(st.session_state.audio_files):
-                if os.path.exists(audio_file):
+            for i, clip in enumerate(st.session_state.audio_files):
+                if clip.exists():
                     file_path = os.path.join(project_dir, f"audio_{i}.mp3")
-                    shutil.copy2(audio_file, file_path)
+                    with open(file_path, "wb") as f:
+                        f.write(clip.read())
                     individual_audio_paths.append(file_path)
             
             project_data["individual_audio_paths"] = individual_audio_paths
@@ -1208,7 +929,14 @@ def load_project(project_id):
             individual_paths = project_data["individual_audio_paths"]
             valid_paths = [p for p in individual_paths if os.path.exists(p)]
             if valid_paths:
-                st.session_state.audio_files = valid_paths
+                # The project's files are kept; their audio is loaded into the clip store
+                discard_untracked_clips()
+                clip_store = get_clip_store()
+                clips = []
+                for path in valid_paths:
+                    with open(path, "rb") as f:
+                        clips.append(clip_store.put(f.read()))
+                st.session_state.audio_files = clips
                 
         # Update analytics
         if project_id in st.session_state.project_analytics:
@@ -1299,7 +1027,13 @@ def perform_ab_test(project_id, test_name, variant_a_data, variant_b_data):
 # Helper function to get ElevenLabs voice ID by name
 def get_elevenlabs_voice_id_by_name(voice_name, voices_dict):
     """Get voice ID from voice name."""
-    return voices_dict.get(voice_name)
+    voice_id = voices_dict.get(voice_name)
+    if voice_id is None:
+        # Fall back to the shared catalog for voices not in this session's dictionary
+        catalog = peek_voice_catalog(st.session_state.elevenlabs_key)
+        if catalog:
+            voice_id = catalog.get_voice_id(voice_name)
+    return voice_id
 
 # Main function
 def main():
@@ -1381,6 +1115,12 @@ def main():
     if "elevenlabs_voice_name" not in st.session_state:
         st.session_state.elevenlabs_voice_name = ""
 
+    # Reuse a voice catalog already fetched by another session with the same key
+    if not st.session_state.elevenlabs_voice_models:
+        shared_catalog = peek_voice_catalog(st.session_state.elevenlabs_key)
+        if shared_catalog:
+            st.session_state.elevenlabs_voice_models = dict(shared_catalog.name_to_id)
+
     # Initialize OpenAI specific variables
     if "openai_voice" not in st.session_state:
         st.session_state.openai_voice = "alloy"
@@ -1457,7 +1197,7 @@ def main():
                 # Fetch ElevenLabs voices
                 if st.button("Fetch ElevenLabs Voices"):
                     with st.spinner("Fetching voices from ElevenLabs..."):
-                        voices = fetch_elevenlabs_voices()
+                        voices = fetch_elevenlabs_voices(force_refresh=True)
                         if voices:
                             st.session_state.elevenlabs_voice_models = voices
                             st.success(f"Successfully fetched {len(voices)} voices from ElevenLabs!")
@@ -1946,6 +1686,14 @@ Julie (optimistic): Though that new camera system might be a game-changer for mo
             # Store selected tracks
             st.session_state.selected_background_tracks = selected_tracks
             
+            # Mixing engine used for the final export
+            single_pass_mix = st.checkbox(
+                "Render the final mix in a single ffmpeg pass",
+                value=st.session_state.get("export_backend", EXPORT_BACKEND) == "ffmpeg",
+                help="Joins, mixes and encodes in one ffmpeg process: faster with constant memory on long projects (needs ffmpeg 4.4+)"
+            )
+            st.session_state.export_backend = "ffmpeg" if single_pass_mix else "pydub"
+            
             # Display summary of selected tracks
             if selected_tracks:
                 st.markdown("#### Selected Background Tracks")
@@ -1977,12 +1725,61 @@ Julie (optimistic): Though that new camera system might be a game-changer for mo
             st.subheader("Step 3: Generate Audio")
             
             # Generate individual audio clips
-            generate_button = st.button("🔊 Generate Voice Audio")
+            # Off by default unless a public URL is set: the stream comes from a local port the browser may not reach
+            progressive_playback = st.checkbox(
+                "Play lines as they are generated",
+                value=bool(PLAYBACK_PUBLIC_URL),
+                help="Start listening to the opening lines while the rest of the script is still being voiced. "
+                     "Needs a browser on the same machine as the app, or VOICECANVAS_PLAYBACK_PUBLIC_URL"
+            )
+            batch_lines = st.checkbox(
+                "Merge consecutive lines of the same voice",
+                value=TTS_BATCH_DEFAULT,
+                help="Send a character's back-to-back lines as one request and split the audio at the pauses; lines whose cut does not match their length are voiced one by one"
+            )
+            background_render = st.checkbox(
+                "Render in a background worker",
+                value=False,
+                help="Keep generating when the page reruns or reloads; the clips are picked up when the job finishes"
+            )
+            generate_button = st.button("🔊 Generate Voice Audio", disabled=bool(st.session_state.render_job_id))
+            
+            # One player at a fixed position; reruns with the same stream URL keep it playing
+            playback_player = st.empty()
+            if st.session_state.playback_url and not generate_button:
+                playback_player.audio(st.session_state.playback_url, format="audio/mpeg", autoplay=True)
+            
+            if generate_button and background_render:
+                # Free previous clips the render graph does not track (e.g. from a loaded project)
+                render_graph = st.session_state.render_graph
+                discard_untracked_clips()
+                st.session_state.audio_files = []
+                st.session_state.playback_url = None
+                
+                jobs, unassigned = plan_line_jobs(st.session_state.parsed_data, st.session_state.character_voices)
+                for character in unassigned:
+                    st.warning(f"No voice assigned for character: {character}")
+                
+                # The worker gets plain data only: the settings snapshot, the parsed script, the voices and the
+                # lines the render graph already has clips for, which it skips
+                render_context = get_service_context()
+                start_background_job("render_job_id", "render", {
+                    "context": render_context.as_payload(),
+                    "parsed_data": st.session_state.parsed_data,
+                    "character_voices": st.session_state.character_voices,
+                    "batch_lines": batch_lines,
+                    "rendered_signatures": [
+                        signature for signature in (line_signature(job, render_context.voice_settings) for job in jobs)
+                        if render_graph.has(signature)
+                    ]
+                })
             
-            if generate_button:
-                # Clear previous audio files
+            elif generate_button:
+                render_graph = st.session_state.render_graph
+                
+                # Free previous clips the render graph does not track (e.g. from a loaded project)
                 if st.session_state.audio_files:
-                    cleanup_temp_files(st.session_state.audio_files)
+                    discard_untracked_clips()
                     st.session_state.audio_files = []
                 
                 # Generate audio for each dialogue line
@@ -1990,56 +1787,90 @@ Julie (optimistic): Though that new camera system might be a game-changer for mo
                 status_text = st.empty()
                 
                 total_lines = len(st.session_state.parsed_data)
-                audio_files = []
                 
-                for i, item in enumerate(st.session_state.parsed_data):
-                    character = item["character"]
-                    dialogue = item["dialogue"]
-                    emotion = item["emotion"]
-                    
+                # Build one generation job per dialogue line
+                jobs, unassigned = plan_line_jobs(st.session_state.parsed_data, st.session_state.character_voices)
+                for character in unassigned:
+                    st.warning(f"No voice assigned for character: {character}")
+                
+                # Workers receive an immutable snapshot instead of reading session state
+                render_context = get_service_context()
+                
+                # Only lines whose text, voice or settings changed since the last render are regenerated
+                signatures = [line_signature(job, render_context.voice_settings) for job in jobs]
+                rendered_signatures = [signature for signature in signatures if render_graph.has(signature)]
+                playback_slots = {}
+                for slot, signature in enumerate(signatures):
+                    playback_slots.setdefault(signature, []).append(slot)
+                signature_of = {job["index"]: signature for job, signature in zip(jobs, signatures)}
+                
+                # Streamed audio is collected per line and served to the player as one growing stream,
+                # so playback starts with the first bytes of the first line
+                playback_buffer = ProgressiveBuffer(len(jobs)) if progressive_playback else None
+                
+                # Unchanged lines are playable right away
+                if playback_buffer:
+                    for slot, signature in enumerate(signatures):
+                        if render_graph.has(signature):
+                            playback_buffer.append(slot, render_graph.clip(signature).read())
+                            playback_buffer.finish(slot)
+                
+                st.session_state.playback_url = publish_stream(playback_buffer) if playback_buffer else None
+                if st.session_state.playback_url:
+                    playback_player.audio(st.session_state.playback_url, format="audio/mpeg", autoplay=True)
+                elif playback_buffer:
+                    st.info("Progressive playback is unavailable because its stream server could not start.")
+                    playback_buffer = None
+                
+                def buffer_chunk(job, chunk):
+                    # Repeated identical lines share one generation
+                    for slot in playback_slots[signature_of[job["index"]]]:
+                        playback_buffer.append(slot, chunk)
+                
+                def finish_line(job, clip):
+                    for slot in playback_slots[signature_of[job["index"]]]:
+                        playback_buffer.finish(slot, failed=not clip)
+                
+                def report_progress(completed, total, job):
                     # Update progress
-                    progress = (i + 1) / total_lines
-                    progress_bar.progress(progress)
-                    status_text.text(f"Generating audio for {character}: {dialogue[:50]}...")
-                    
-                    # Get voice settings for character
-                    if character in st.session_state.character_voices:
-                        voice_config = st.session_state.character_voices[character]
-                        provider = voice_config["provider"]
-                        voice_id = voice_config["voice_id"]
-                        
-                        # Generate audio based on provider
-                        if provider == "openai":
-                            # Generate OpenAI audio
-                            audio_path = generate_voice_openai(
-                                dialogue,
-                                voice_id,
-                                speed=st.session_state.voice_settings.get("speed", 1.0),
-                                emotion=emotion
-                            )
-                        elif provider == "elevenlabs":
-                            # Generate ElevenLabs audio
-                            audio_path = generate_voice_elevenlabs(
-                                dialogue,
-                                voice_id,
-                                stability=st.session_state.voice_settings.get("stability", 0.5),
-                                similarity_boost=st.session_state.voice_settings.get("similarity_boost", 0.75),
-                                emotion=emotion
-                            )
-                        
-                        if audio_path:
-                            audio_files.append(audio_path)
-                    else:
-                        st.warning(f"No voice assigned for character: {character}")
+                    progress_bar.progress(completed / total)
+                    status_text.text(f"Generated {completed}/{total} requests - {job['character']}: {display_text(job)[:50]}...")
+                
+                # Lines are generated concurrently but returned in script order
+                dirty_lines = len(render_graph.dirty_jobs(jobs, signatures))
+                status_text.text(f"Generating audio for {dirty_lines} changed of {total_lines} dialogue lines...")
+                try:
+                    outcome = render_lines(
+                        jobs,
+                        render_context,
+                        rendered_signatures,
+                        batch_lines=batch_lines,
+                        on_chunk=buffer_chunk if playback_buffer else None,
+                        on_line_done=finish_line if playback_buffer else None,
+                        on_progress=report_progress
+                    )
+                finally:
+                    # Listeners stop waiting for lines that will not arrive
+                    if playback_buffer:
+                        playback_buffer.close()
+                for error in outcome["errors"]:
+                    st.error(error)
                 
-                # Store generated audio files
-                st.session_state.audio_files = audio_files
-                status_text.text(f"Generated audio for {len(audio_files)} dialogue lines.")
+                # Splice unchanged and regenerated clips back into script order and drop clips of removed lines
+                store_rendered_clips([job["index"] for job in jobs], outcome["signatures"], outcome["clips"])
+                st.session_state.render_timings = {"Generate": outcome["timings"]}
+                audio_files = st.session_state.audio_files
+                reused_lines = len(jobs) - outcome["dirty_lines"]
+                status_text.text(f"Generated audio for {len(audio_files)} dialogue lines ({reused_lines} unchanged, {outcome['cache_hits']} reused from cache).")
                 
                 # Continue to next step
                 if audio_files:
                     st.session_state.current_step = 4
                     st.rerun()
+            
+            # A background render is polled until its clips are ready
+            if st.session_state.render_job_id:
+                show_job_status("render_job_id", apply_render_job_result)
         
         # Step 4: Final Export
         if st.session_state.current_step >= 4:
@@ -2056,6 +1887,14 @@ Julie (optimistic): Though that new camera system might be a game-changer for mo
             
             st.subheader("Step 4: Final Export")
             
+            missing_lines = st.session_state.get("missing_lines")
+            if missing_lines:
+                st.warning(
+                    f"{len(missing_lines)} dialogue line(s) could not be generated and are missing from the narration "
+                    f"(lines {', '.join(str(line) for line in missing_lines[:20])}). "
+                    "Click Generate Voice Audio again to retry only those lines."
+                )
+            
             # Combine audio files if not already done
             if st.session_state.audio_files and not st.session_state.final_audio:
                 with st.spinner("Combining audio files..."):
@@ -2066,12 +1905,14 @@ Julie (optimistic): Though that new camera system might be a game-changer for mo
                     bg_track = None  # Replace with actual background track path if implemented
                     
                     # Combine audio files
-                    combined_path = concatenate_audio_files(
-                        st.session_state.audio_files,
-                        final_audio_path,
-                        background_track=bg_track,
-                        bg_volume=st.session_state.bg_volume
-                    )
+                    with trace("export") as export_trace:
+                        combined_path = concatenate_audio_files(
+                            st.session_state.audio_files,
+                            final_audio_path,
+                            background_track=bg_track,
+                            bg_volume=st.session_state.bg_volume
+                        )
+                    st.session_state.render_timings = dict(st.session_state.get("render_timings") or {}, Export=export_trace.breakdown())
                     
                     if combined_path:
                         st.session_state.final_audio = combined_path
@@ -2085,9 +1926,11 @@ Julie (optimistic): Though that new camera system might be a game-changer for mo
                 </div>
                 """, unsafe_allow_html=True)
                 
+                # The export is read once and reused by the player and the download link
                 with open(st.session_state.final_audio, "rb") as f:
                     audio_bytes = f.read()
-                    st.audio(audio_bytes)
+                st.audio(audio_bytes)
+                show_timing_breakdown(st.session_state.get("render_timings"), caches=True)
             
                 # Display story text if available
                 if st.session_state.story_text:
@@ -2105,8 +1948,7 @@ Julie (optimistic): Though that new camera system might be a game-changer for mo
                         st.markdown("</div>", unsafe_allow_html=True)
                 
                 # Download button for final audio
-                with open(st.session_state.final_audio, "rb") as f:
-                    b64_audio = base64.b64encode(f.read()).decode()
+                b64_audio = base64.b64encode(audio_bytes).decode()
                     
                 download_filename = f"voice_narration_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp3"
                 download_link = f'<a href="data:audio/mp3;base64,{b64_audio}" download="{download_filename}" style="display: inline-block; padding: 0.5rem 1rem; background: linear-gradient(120deg, #6C63FF 0%, #8B5CF6 100%); color: white; text-decoration: none; border-radius: 0.5rem; font-weight: 600; margin-top: 1rem; box-shadow: 0 4px 12px rgba(108, 99, 255, 0.25); transition: all 0.3s ease;">Download Voice Narration</a>'
@@ -2324,10 +2166,12 @@ Julie (optimistic): Though that new camera system might be a game-changer for mo
                 # Reset button
                 st.markdown("<hr>", unsafe_allow_html=True)
                 if st.button("🔄 Start New Project"):
-                    # Clean up temporary files
-                    cleanup_temp_files(st.session_state.audio_files)
+                    # Free the clips and clean up temporary files
+                    for clip in st.session_state.audio_files:
+                        clip.discard()
                     if st.session_state.final_audio:
                         cleanup_temp_files([st.session_state.final_audio])
+                    st.session_state.render_graph.clear()
                     
                     # Reset session state
                     st.session_state.parsed_data = []
@@ -2714,7 +2558,7 @@ def render_dubbing_interface():
             # Fetch ElevenLabs voices
             if st.button("Fetch ElevenLabs Voices", key="fetch_elevenlabs_dubbing"):
                 with st.spinner("Fetching voices from ElevenLabs..."):
-                    voices = fetch_elevenlabs_voices()
+                    voices = fetch_elevenlabs_voices(force_refresh=True)
                     if voices:
                         st.session_state.elevenlabs_voice_models = voices
                         st.success(f"Successfully fetched {len(voices)} voices from ElevenLabs!")
@@ -2823,20 +2667,45 @@ def render_dubbing_interface():
     # Dubbing process - enhanced button style
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        start_dubbing = st.button("🎬 Start Dubbing Process", use_container_width=True)
+        background_dubbing = st.checkbox(
+            "Dub in a background worker",
+            value=False,
+            help="Keep dubbing when the page reruns or reloads; the result is picked up when the job finishes"
+        )
+        start_dubbing = st.button("🎬 Start Dubbing Process", use_container_width=True, disabled=bool(st.session_state.dub_job_id))
     
     if st.session_state.uploaded_audio and start_dubbing:
+        # Preview dubbed chunks as soon as each one is ready
+        chunk_status = st.empty()
+        first_chunk_preview = st.empty()
+        
+        def show_dubbed_chunk(index, total, chunk_path):
+            chunk_status.text(f"Dubbed chunk {index + 1} of {total}")
+            if index == 0:
+                with open(chunk_path, "rb") as chunk_file:
+                    first_chunk_preview.audio(chunk_file.read())
+        
         # Validate provider-specific requirements
         if dubbing_provider == "OpenAI":
             if not st.session_state.openai_key:
                 st.error("Please enter your OpenAI API key.")
+            elif background_dubbing:
+                start_background_job("dub_job_id", "dub", {
+                    "context": get_service_context().as_payload(),
+                    "provider": "openai",
+                    "audio_path": st.session_state.uploaded_audio,
+                    "target_language": lang_code,
+                    "voice": st.session_state.openai_voice
+                })
             else:
-                with st.spinner(f"Dubbing audio to {target_language} with OpenAI..."):
+                with st.spinner(f"Dubbing audio to {target_language} with OpenAI..."), trace("dub") as dub_trace:
                     dubbed_audio_path = openai_dubbing(
                         st.session_state.uploaded_audio, 
                         lang_code, 
-                        st.session_state.openai_voice
+                        st.session_state.openai_voice,
+                        on_chunk_ready=show_dubbed_chunk
                     )
+                    st.session_state.dub_timings = {"Dubbing": dub_trace.breakdown()}
                     
                     if dubbed_audio_path:
                         st.session_state.dubbed_audio = dubbed_audio_path
@@ -2848,25 +2717,40 @@ def render_dubbing_interface():
                 st.error("Please enter your ElevenLabs API key.")
             elif not voice_id:
                 st.error("Please select a voice for dubbing.")
+            elif background_dubbing:
+                start_background_job("dub_job_id", "dub", {
+                    "context": get_service_context().as_payload(),
+                    "provider": "elevenlabs",
+                    "audio_path": st.session_state.uploaded_audio,
+                    "target_language": lang_code,
+                    "voice": voice_id
+                })
             else:
-                with st.spinner(f"Dubbing audio to {target_language} with ElevenLabs..."):
+                with st.spinner(f"Dubbing audio to {target_language} with ElevenLabs..."), trace("dub") as dub_trace:
                     dubbed_audio_path = elevenlabs_dubbing(
                         st.session_state.uploaded_audio, 
                         lang_code, 
-                        voice_id
+                        voice_id,
+                        on_chunk_ready=show_dubbed_chunk
                     )
+                    st.session_state.dub_timings = {"Dubbing": dub_trace.breakdown()}
                     
                     if dubbed_audio_path:
                         st.session_state.dubbed_audio = dubbed_audio_path
                         st.success(f"Audio successfully dubbed to {target_language} with ElevenLabs!")
                         st.rerun()
     
+    # A background dubbing job is polled until the dubbed audio is ready
+    if st.session_state.dub_job_id:
+        show_job_status("dub_job_id", apply_dub_job_result)
+    
     # Display dubbed audio if available
     if st.session_state.dubbed_audio:
         st.subheader(f"Dubbed Audio ({target_language})")
         with open(st.session_state.dubbed_audio, "rb") as audio_file:
             audio_bytes = audio_file.read()
             st.audio(audio_bytes)
+        show_timing_breakdown(st.session_state.get("dub_timings"))
             
         # Download button for dubbed audio
         with open(st.session_state.dubbed_audio, "rb") as f:
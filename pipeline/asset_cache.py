@@ -0,0 +1,247 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+
+import requests
+from pydub import AudioSegment
+
+from pipeline.audio_assembly import conform_segment
+
+# Location, size budget and freshness window of the background asset cache
+ASSET_CACHE_DIR = os.environ.get(
+    "VOICECANVAS_ASSET_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "voicecanvas_asset_cache")
+)
+ASSET_CACHE_MAX_BYTES = int(os.environ.get("VOICECANVAS_ASSET_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+ASSET_MAX_AGE_SECONDS = int(os.environ.get("VOICECANVAS_ASSET_MAX_AGE_SECONDS", str(24 * 60 * 60)))
+
+SOURCE_NAME = "source.mp3"
+PCM_NAME = "pcm.raw"
+PCM_VARIANT_PREFIX = "pcm_"
+META_NAME = "meta.json"
+
+# Guards the per-entry lock table and eviction; each entry's files are guarded by its own lock,
+# so a slow download of one asset never blocks requests for another
+_asset_lock = threading.Lock()
+_entry_locks = {}  # entry directory -> RLock
+
+def _entry_dir(url):
+    return os.path.join(ASSET_CACHE_DIR, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+def _entry_lock(entry_dir):
+    with _asset_lock:
+        lock = _entry_locks.get(entry_dir)
+        if lock is None:
+            lock = threading.RLock()
+            _entry_locks[entry_dir] = lock
+        return lock
+
+def _file_stamp(path):
+    # Size and modification time identify the copy this process wrote, without reading it back
+    stat = os.stat(path)
+    return {"bytes": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def _stamp_matches(path, stamp):
+    try:
+        return bool(stamp) and _file_stamp(path) == {"bytes": stamp.get("bytes"), "mtime_ns": stamp.get("mtime_ns")}
+    except OSError:
+        return False
+
+def _read_meta(entry_dir):
+    try:
+        with open(os.path.join(entry_dir, META_NAME), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_meta(entry_dir, meta):
+    fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix=".part")
+    with os.fdopen(fd, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(entry_dir, META_NAME))
+
+def _write_file(entry_dir, name, data):
+    fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix=".part")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, os.path.join(entry_dir, name))
+
+def _source_is_valid(entry_dir, meta):
+    return bool(meta) and _stamp_matches(os.path.join(entry_dir, SOURCE_NAME), meta.get("source"))
+
+# Function to check whether a path belongs to the asset cache
+def is_cached_asset(path):
+    """Return True if the path points into the background asset cache."""
+    if not path:
+        return False
+    cache_root = os.path.abspath(ASSET_CACHE_DIR) + os.sep
+    return os.path.abspath(path).startswith(cache_root)
+
+# Function to fetch a background asset through the cache
+def fetch_cached_asset(url, headers=None, timeout=30):
+    """Return a local path for the asset at url, downloading or revalidating only when needed."""
+    entry_dir = _entry_dir(url)
+    source_path = os.path.join(entry_dir, SOURCE_NAME)
+
+    with _entry_lock(entry_dir):
+        os.makedirs(entry_dir, exist_ok=True)
+        meta = _read_meta(entry_dir)
+        valid = _source_is_valid(entry_dir, meta)
+
+        # Fresh, intact copies are served without any network I/O
+        if valid and time.time() - meta.get("fetched_at", 0) < ASSET_MAX_AGE_SECONDS:
+            meta["last_used"] = time.time()
+            _write_meta(entry_dir, meta)
+            return source_path
+
+        request_headers = dict(headers or {})
+        if valid:
+            if meta.get("etag"):
+                request_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request_headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            response = requests.get(url, headers=request_headers, timeout=timeout)
+        except requests.RequestException:
+            if valid:
+                # Keep serving the stale copy while the origin is unreachable
+                return source_path
+            raise
+
+        if response.status_code == 304 and valid:
+            meta["fetched_at"] = time.time()
+            meta["last_used"] = time.time()
+            _write_meta(entry_dir, meta)
+            return source_path
+
+        if response.status_code != 200:
+            if valid:
+                return source_path
+            return None
+
+        _write_file(entry_dir, SOURCE_NAME, response.content)
+
+        # A new source invalidates the decoded PCM copies
+        for file_name in os.listdir(entry_dir):
+            if file_name == PCM_NAME or file_name.startswith(PCM_VARIANT_PREFIX):
+                os.remove(os.path.join(entry_dir, file_name))
+
+        _write_meta(entry_dir, {
+            "url": url,
+            "source": _file_stamp(source_path),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "last_used": time.time()
+        })
+        _evict_assets(keep=entry_dir)
+        return source_path
+
+# Function to load a background asset as audio
+def load_asset_audio(path):
+    """Load background audio, using the cached pre-decoded PCM copy for cached assets."""
+    if not is_cached_asset(path):
+        return AudioSegment.from_file(path)
+
+    entry_dir = os.path.dirname(path)
+    pcm_path = os.path.join(entry_dir, PCM_NAME)
+
+    with _entry_lock(entry_dir):
+        meta = _read_meta(entry_dir) or {}
+        pcm = meta.get("pcm")
+        if pcm and _stamp_matches(pcm_path, pcm):
+            with open(pcm_path, "rb") as f:
+                return AudioSegment(
+                    data=f.read(),
+                    sample_width=pcm["sample_width"],
+                    frame_rate=pcm["frame_rate"],
+                    channels=pcm["channels"]
+                )
+
+        # Decode once and keep the raw PCM next to the source
+        audio = AudioSegment.from_file(path)
+        _write_file(entry_dir, PCM_NAME, audio.raw_data)
+        meta["pcm"] = dict(
+            _file_stamp(pcm_path),
+            sample_width=audio.sample_width,
+            frame_rate=audio.frame_rate,
+            channels=audio.channels
+        )
+        _write_meta(entry_dir, meta)
+        _evict_assets(keep=entry_dir)
+        return audio
+
+def _valid_variant(entry_dir, name):
+    variant = (_read_meta(entry_dir) or {}).get("pcm_variants", {}).get(name)
+    variant_path = os.path.join(entry_dir, name)
+    if variant and _stamp_matches(variant_path, variant):
+        return variant
+    return None
+
+# Function to get raw PCM of a cached asset in a given layout
+def asset_pcm_path(path, frame_rate, sample_width):
+    """Return the path of a cached asset's raw PCM at frame_rate and sample_width, and its channel count.
+
+    Each layout is converted once and kept next to the source so it can be memory-mapped by later exports.
+    """
+    entry_dir = os.path.dirname(path)
+    name = f"{PCM_VARIANT_PREFIX}{frame_rate}_{sample_width}.raw"
+
+    with _entry_lock(entry_dir):
+        variant = _valid_variant(entry_dir, name)
+        if variant is None:
+            audio = conform_segment(load_asset_audio(path), frame_rate=frame_rate, sample_width=sample_width)
+            _write_file(entry_dir, name, audio.raw_data)
+            meta = _read_meta(entry_dir) or {}
+            variant = dict(_file_stamp(os.path.join(entry_dir, name)), channels=audio.channels)
+            meta.setdefault("pcm_variants", {})[name] = variant
+            _write_meta(entry_dir, meta)
+            _evict_assets(keep=entry_dir)
+
+    return os.path.join(entry_dir, name), variant["channels"]
+
+def _evict_assets(keep=None):
+    with _asset_lock:
+        _evict_unlocked(keep)
+
+def _evict_unlocked(keep):
+    entries = []
+    total = 0
+    if not os.path.isdir(ASSET_CACHE_DIR):
+        return
+    for name in os.listdir(ASSET_CACHE_DIR):
+        entry_dir = os.path.join(ASSET_CACHE_DIR, name)
+        if not os.path.isdir(entry_dir):
+            continue
+        size = 0
+        for file_name in os.listdir(entry_dir):
+            try:
+                size += os.path.getsize(os.path.join(entry_dir, file_name))
+            except OSError:
+                pass
+        meta = _read_meta(entry_dir) or {}
+        entries.append((meta.get("last_used", 0), entry_dir, size))
+        total += size
+
+    # Remove least recently used assets until the cache fits its budget
+    entries.sort()
+    for _, entry_dir, size in entries:
+        if total <= ASSET_CACHE_MAX_BYTES:
+            break
+        if entry_dir == keep:
+            continue
+        # Entries another thread is downloading or decoding are left for a later pass
+        lock = _entry_locks.get(entry_dir)
+        if lock is not None and not lock.acquire(blocking=False):
+            continue
+        try:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+        finally:
+            if lock is not None:
+                lock.release()
+        total -= size
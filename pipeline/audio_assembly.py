@@ -0,0 +1,90 @@
+import os
+import wave
+import tempfile
+import subprocess
+
+from pydub import AudioSegment
+
+# Pause inserted between consecutive dialogue clips
+DEFAULT_PAUSE_MS = 1000
+# Narration WAVs are written with at least 16-bit samples
+MIN_SAMPLE_WIDTH = 2
+
+# Function to convert a decoded segment to a fixed PCM layout
+def conform_segment(segment, frame_rate=None, channels=None, sample_width=None):
+    """Convert a segment to the requested frame rate, channel count and sample width where they differ."""
+    if frame_rate and segment.frame_rate != frame_rate:
+        segment = segment.set_frame_rate(frame_rate)
+    if channels and segment.channels != channels:
+        segment = segment.set_channels(channels)
+    if sample_width and segment.sample_width != sample_width:
+        segment = segment.set_sample_width(sample_width)
+    return segment
+
+# Function to stream clips into a single WAV file
+def assemble_clips_to_wav(audio_files, wav_path=None, pause_ms=DEFAULT_PAUSE_MS):
+    """Decode each clip once and append its PCM frames, with pauses, to a WAV file."""
+    if not audio_files:
+        return None
+    return assemble_segments_to_wav((AudioSegment.from_file(audio_file) for audio_file in audio_files), wav_path, pause_ms)
+
+# Function to stream decoded segments into a single WAV file
+def assemble_segments_to_wav(segments, wav_path=None, pause_ms=DEFAULT_PAUSE_MS):
+    """Append already decoded segments, with pauses, to a WAV file in the first segment's PCM layout."""
+    segments = iter(segments)
+    first = next(segments, None)
+    if first is None:
+        return None
+
+    if wav_path is None:
+        fd, wav_path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+
+    # The first clip fixes the PCM layout for the whole narration. 8-bit audio is widened to 16-bit, since
+    # WAV stores 8-bit samples unsigned while pydub and the mixer work with signed samples
+    if first.sample_width < MIN_SAMPLE_WIDTH:
+        first = first.set_sample_width(MIN_SAMPLE_WIDTH)
+    frame_rate = first.frame_rate
+    channels = first.channels
+    sample_width = first.sample_width
+
+    pause_frames = int(frame_rate * pause_ms / 1000)
+    pause_bytes = b"\x00" * (pause_frames * channels * sample_width)
+
+    with wave.open(wav_path, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(sample_width)
+        writer.setframerate(frame_rate)
+
+        writer.writeframes(first.raw_data)
+        del first
+
+        # Frames are written sequentially, so memory stays at one clip
+        for segment in segments:
+            segment = conform_segment(segment, frame_rate, channels, sample_width)
+            writer.writeframes(pause_bytes)
+            writer.writeframes(segment.raw_data)
+
+    return wav_path
+
+# Function to encode a WAV file to MP3 in one pass
+def encode_wav_to_mp3(wav_path, output_path, bitrate=None):
+    """Encode a WAV file to MP3 with a single ffmpeg process, streaming from disk."""
+    command = [AudioSegment.converter, "-y", "-loglevel", "error", "-i", wav_path, "-f", "mp3"]
+    if bitrate:
+        command += ["-b:a", bitrate]
+    command.append(output_path)
+
+    result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to encode MP3: {result.stderr.decode(errors='ignore').strip()}")
+    return output_path
+
+# Function to remove an intermediate file
+def remove_intermediate(path):
+    """Delete an intermediate file, ignoring errors."""
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,55 @@
+import numpy as np
+from pydub import AudioSegment
+
+from pipeline.asset_cache import is_cached_asset, asset_pcm_path
+from pipeline.audio_assembly import conform_segment
+
+# numpy sample types matching pydub's sample widths. There is no 8-bit entry: 8-bit WAV samples are unsigned,
+# so narration is widened to 16-bit when it is assembled and beds are converted to the narration's width
+SAMPLE_DTYPES = {2: np.int16, 4: np.int32}
+
+
+class BackgroundBed:
+    """Decoded background loop that produces any length by tiling, without growing copies of the source."""
+
+    def __init__(self, samples, frame_rate, sample_width):
+        self.samples = samples  # (frames, channels) array, possibly memory-mapped
+        self.frame_rate = frame_rate
+        self.sample_width = sample_width
+        self.channels = samples.shape[1]
+
+    @property
+    def frame_count(self):
+        return self.samples.shape[0]
+
+    def frames(self, start, count):
+        """Return count frames of the loop starting at frame start, wrapping around the end."""
+        if self.frame_count == 0:
+            return np.zeros((count, self.channels), dtype=self.samples.dtype)
+        out = np.empty((count, self.channels), dtype=self.samples.dtype)
+        position = start % self.frame_count
+        filled = 0
+
+        # Copy whole slices of the loop rather than indexing frame by frame
+        while filled < count:
+            take = min(count - filled, self.frame_count - position)
+            out[filled:filled + take] = self.samples[position:position + take]
+            filled += take
+            position = 0
+        return out
+
+# Function to load a background track as a tiling bed
+def load_background_bed(path, frame_rate, sample_width):
+    """Load a background track at the narration's frame rate and sample width.
+
+    Cached assets are memory-mapped from their pre-converted PCM; other files are decoded into memory.
+    """
+    dtype = SAMPLE_DTYPES[sample_width]
+    if is_cached_asset(path):
+        pcm_path, channels = asset_pcm_path(path, frame_rate, sample_width)
+        samples = np.memmap(pcm_path, dtype=dtype, mode="r")
+    else:
+        audio = conform_segment(AudioSegment.from_file(path), frame_rate=frame_rate, sample_width=sample_width)
+        channels = audio.channels
+        samples = np.frombuffer(audio.raw_data, dtype=dtype)
+    return BackgroundBed(samples.reshape(-1, channels), frame_rate, sample_width)
@@ -0,0 +1,134 @@
+# Headless narration rendering: the app's parse -> generate -> concatenate steps without the UI
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from pipeline import services
+from pipeline.render_jobs import plan_line_jobs, generate_clips
+from pipeline.script_parser import parse_text_from_string
+from pipeline.tracing import trace, flush_metrics
+
+# Function to render one script to a finished MP3
+def render_script(script_text, character_voices, output_path, openai_key=None, elevenlabs_key=None,
+                  voice_settings=None, background_tracks=None, bg_volume=0.3, volume_automation=None,
+                  export_backend=None):
+    """Parse, voice and concatenate a dialogue script, returning a summary of the render."""
+    started = time.time()
+    context = services.build_context(
+        openai_key=openai_key,
+        elevenlabs_key=elevenlabs_key,
+        voice_settings=voice_settings,
+        background_tracks=background_tracks,
+        bg_volume=bg_volume,
+        volume_automation=volume_automation,
+        export_backend=export_backend
+    )
+    return render_parsed(parse_text_from_string(script_text), character_voices, output_path, context, started)
+
+# Function to render already parsed dialogue with an explicit context
+def render_parsed(parsed_data, character_voices, output_path, context, started=None):
+    """Generate and concatenate parsed dialogue lines using only the given service context."""
+    started = started or time.time()
+    jobs, unassigned = plan_line_jobs(parsed_data, character_voices)
+    with trace("batch_render") as render_trace:
+        results, errors = generate_clips(jobs, context)
+        clips = [clip for clip in results if clip]
+
+        final_path = None
+        try:
+            if clips:
+                result = services.concatenate_clips(context, clips, output_path)
+                errors.extend(result.warnings)
+                if result.error:
+                    errors.append(result.error)
+                final_path = result.value
+        finally:
+            for clip in clips:
+                clip.discard()
+
+    return {
+        "output": final_path,
+        "lines": len(parsed_data),
+        "rendered": len(clips),
+        "failed": len(jobs) - len(clips),
+        "unassigned_characters": unassigned,
+        "errors": errors,
+        "seconds": round(time.time() - started, 3),
+        "timings": render_trace.breakdown()
+    }
+
+# Function to render a script file
+def render_script_file(script_path, character_voices, output_path, **options):
+    """Read a script file and render it with render_script."""
+    with open(script_path, "r", encoding="utf-8") as f:
+        script_text = f.read()
+    summary = render_script(script_text, character_voices, output_path, **options)
+    summary["script"] = script_path
+    return summary
+
+def _output_path_for(script_path, args):
+    if args.output and len(args.scripts) == 1:
+        return args.output
+    output_dir = args.output_dir or os.path.dirname(os.path.abspath(script_path))
+    os.makedirs(output_dir, exist_ok=True)
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(script_path))[0] + ".mp3")
+
+def _render_from_args(script_path, character_voices, output_path, options):
+    try:
+        return render_script_file(script_path, character_voices, output_path, **options)
+    finally:
+        # Forked pool processes exit without running atexit handlers
+        flush_metrics()
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Render dialogue scripts to MP3 without the Streamlit UI.")
+    parser.add_argument("scripts", nargs="+", help="Script files in 'Character (emotion): Dialogue' format")
+    parser.add_argument("--voices", required=True, help="JSON file mapping characters to {provider, voice_id}")
+    parser.add_argument("-o", "--output", help="Output MP3 path (single script only)")
+    parser.add_argument("--output-dir", help="Directory for rendered MP3s (defaults to each script's directory)")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of scripts rendered in parallel processes")
+    parser.add_argument("--speed", type=float, default=1.0, help="OpenAI speech speed")
+    parser.add_argument("--stability", type=float, default=0.5, help="ElevenLabs stability")
+    parser.add_argument("--similarity-boost", type=float, default=0.75, help="ElevenLabs similarity boost")
+    parser.add_argument("--background", action="append", default=[], help="Local background track file (repeatable)")
+    parser.add_argument("--bg-volume", type=float, default=0.3, help="Background volume from 0 to 1")
+    parser.add_argument("--export-backend", choices=["pydub", "ffmpeg"], help="Final mix engine (default: VOICECANVAS_EXPORT_BACKEND or pydub)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.output and len(args.scripts) > 1:
+        print("--output can only be used with a single script; use --output-dir instead", file=sys.stderr)
+        return 2
+
+    with open(args.voices, "r", encoding="utf-8") as f:
+        character_voices = json.load(f)
+
+    options = {
+        "voice_settings": {
+            "speed": args.speed,
+            "stability": args.stability,
+            "similarity_boost": args.similarity_boost
+        },
+        "background_tracks": [{"name": os.path.basename(path), "path": path} for path in args.background],
+        "bg_volume": args.bg_volume,
+        "export_backend": args.export_backend
+    }
+
+    tasks = [(script, character_voices, _output_path_for(script, args), options) for script in args.scripts]
+    if args.jobs > 1 and len(tasks) > 1:
+        # Scripts are independent, so they render in separate processes
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            summaries = list(executor.map(_render_from_args, *zip(*tasks)))
+    else:
+        summaries = [_render_from_args(*task) for task in tasks]
+
+    for summary in summaries:
+        print(json.dumps(summary))
+    return 0 if all(summary["output"] for summary in summaries) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
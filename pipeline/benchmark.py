@@ -0,0 +1,211 @@
+# Offline pipeline benchmark: convert -> parse -> generate -> export against the local mock API server
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+from dataclasses import asdict
+from concurrent.futures import ProcessPoolExecutor
+
+from pipeline.mock_api import MockApiServer, add_settings_arguments, settings_from_arguments
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_SIZES = (10, 100, 1000)
+# Pacing is left to the mock server's fault injection instead of the client-side limiter
+BENCHMARK_RPM = "100000"
+FILLER_WORDS = ("quietly", "the old lighthouse", "before dawn", "across the harbour", "without a word", "once more")
+
+# Function to write a paragraph the mock dialogue conversion turns into one line per sentence
+def build_paragraph(line_count, seed=0):
+    """Return line_count sentences of varying length, unique per call so no cache answers them."""
+    rng = random.Random(seed)
+    run_id = uuid.uuid4().hex[:8]
+    sentences = []
+    for i in range(line_count):
+        filler = " ".join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(1, 6)))
+        sentences.append(f"Line {i + 1} of run {run_id} moves the story on {filler}.")
+    return " ".join(sentences)
+
+def _character_voices(provider, elevenlabs_voice_id):
+    openai_voices = {"Narrator": "alloy", "Anna": "nova", "Ben": "echo"}
+    voices = {}
+    for i, (character, openai_voice) in enumerate(openai_voices.items()):
+        use_elevenlabs = provider == "elevenlabs" or (provider == "mixed" and i % 2 == 1)
+        if use_elevenlabs:
+            voices[character] = {"provider": "elevenlabs", "voice_id": elevenlabs_voice_id}
+        else:
+            voices[character] = {"provider": "openai", "voice_id": openai_voice}
+    return voices
+
+def _peak_rss_mb(who):
+    # Linux reports ru_maxrss in kilobytes, macOS in bytes
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+# Function to benchmark one script size
+def run_benchmark(line_count, provider="mixed", background_path=None, export_backend=None, seed=0):
+    """Render a line_count-line script end to end and return throughput, per-stage timings and peak RSS.
+
+    Meant to run in a fresh process whose environment already points the clients at the mock server.
+    The result is marked invalid when dialogue conversion failed or produced a different number of lines.
+    """
+    # Imported here so the provider clients pick up the mock server's environment
+    from pipeline import services
+    from pipeline.render_jobs import plan_line_jobs, generate_clips
+    from pipeline.script_parser import parse_text_from_string
+    from pipeline.tracing import trace, span
+
+    context = services.build_context(
+        voice_settings={"speed": 1.0, "stability": 0.5, "similarity_boost": 0.75},
+        background_tracks=[{"path": background_path, "volume": 0.3}] if background_path else None,
+        export_backend=export_backend
+    )
+    paragraph = build_paragraph(line_count, seed)
+    output_dir = tempfile.mkdtemp(prefix="voicecanvas_benchmark_")
+    clips = []
+    errors = []
+    started = time.perf_counter()
+    try:
+        with trace("benchmark") as benchmark_trace:
+            with span("voices", provider="elevenlabs") as record:
+                voices = services.list_elevenlabs_voices(context)
+                record["error"] = voices.error
+            elevenlabs_voice_id = next(iter((voices.value or {}).values()), "mock-voice-rachel")
+
+            conversion = services.convert_paragraph_to_dialogue(context, paragraph)
+            if conversion.error:
+                errors.append(conversion.error)
+            dialogue = conversion.value or paragraph
+            with span("parse", chars=len(dialogue)):
+                parsed_data = parse_text_from_string(dialogue)
+
+            jobs, _ = plan_line_jobs(parsed_data, _character_voices(provider, elevenlabs_voice_id))
+            with span("generate", lines=len(jobs)):
+                results, generate_errors = generate_clips(jobs, context)
+            errors.extend(generate_errors)
+            clips = [clip for clip in results if clip]
+
+            if clips:
+                result = services.concatenate_clips(context, clips, os.path.join(output_dir, "benchmark.mp3"))
+                errors.extend(result.warnings)
+                if result.error:
+                    errors.append(result.error)
+        seconds = time.perf_counter() - started
+    finally:
+        for clip in clips:
+            clip.discard()
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    invalid_reasons = []
+    dialogue_errors = sum(row["errors"] for row in benchmark_trace.breakdown() if row["stage"] == "llm.dialogue")
+    if dialogue_errors:
+        invalid_reasons.append("dialogue conversion failed")
+    if len(parsed_data) != line_count:
+        invalid_reasons.append(f"script has {len(parsed_data)} of {line_count} requested lines")
+
+    return {
+        "requested_lines": line_count,
+        "lines": len(parsed_data),
+        "valid": not invalid_reasons,
+        "invalid_reasons": invalid_reasons,
+        "rendered": len(clips),
+        "failed": len(jobs) - len(clips),
+        "seconds": round(seconds, 3),
+        "lines_per_sec": round(len(clips) / seconds, 2) if seconds else 0,
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF) if resource else None,
+        "peak_child_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+        "stages": benchmark_trace.breakdown(),
+        "errors": errors[:10]
+    }
+
+# Function to format one benchmark result as a table
+def format_result(result):
+    """Return a human-readable summary line and per-stage p50/p95 table for a run_benchmark result."""
+    rss = f"{result['peak_rss_mb']} MB" if result["peak_rss_mb"] is not None else "n/a"
+    lines = [
+        f"{result['lines']} lines: {result['seconds']:.2f} s, {result['lines_per_sec']:.1f} lines/s, "
+        f"peak RSS {rss}, {result['failed']} failed"
+    ]
+    lines.extend(f"  INVALID RUN: {reason}" for reason in result["invalid_reasons"])
+    lines.append(f"  {'stage':<20}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'total ms':>12}{'errors':>8}")
+    for row in result["stages"]:
+        lines.append(
+            f"  {row['stage']:<20}{row['count']:>7}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}"
+            f"{row['total_ms']:>12.1f}{row['errors']:>8}"
+        )
+    for error in result["errors"]:
+        lines.append(f"  ! {error}")
+    return "\n".join(lines)
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the narration pipeline offline against a local mock of the provider APIs."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Script sizes in lines")
+    parser.add_argument("--provider", choices=("mixed", "openai", "elevenlabs"), default="mixed",
+                        help="TTS provider of the script's characters")
+    parser.add_argument("--background", help="Background track to mix under the narration")
+    parser.add_argument("--export-backend", choices=("pydub", "ffmpeg"), help="Export backend to benchmark")
+    parser.add_argument("--output", help="JSON lines file each result is appended to, for tracking over time")
+    return add_settings_arguments(parser)
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    settings = settings_from_arguments(args)
+    scratch_dir = tempfile.mkdtemp(prefix="voicecanvas_benchmark_cache_")
+    all_valid = True
+    try:
+        with MockApiServer(settings) as server:
+            # Spawned children inherit this environment: mock endpoints, throwaway keys and empty caches
+            os.environ.update(server.client_environment())
+            os.environ.update({
+                "OPENAI_API_KEY": "mock-openai-key",
+                "ELEVENLABS_API_KEY": "mock-elevenlabs-key",
+                "GROQ_API_KEY": "mock-groq-key",
+                "VOICECANVAS_CLIP_CACHE_DIR": os.path.join(scratch_dir, "clips"),
+                "VOICECANVAS_LLM_CACHE_PATH": os.path.join(scratch_dir, "llm_cache.sqlite3")
+            })
+            os.environ.setdefault("OPENAI_TTS_RPM", BENCHMARK_RPM)
+            os.environ.setdefault("ELEVENLABS_TTS_RPM", BENCHMARK_RPM)
+
+            server.take_stats()
+            for size in args.sizes:
+                # One fresh process per size, so peak RSS belongs to that size alone
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                    result = pool.submit(
+                        run_benchmark, size, args.provider, args.background, args.export_backend, args.seed
+                    ).result()
+                result["mock_requests"] = server.take_stats()
+                all_valid = all_valid and result["valid"]
+                print(format_result(result), flush=True)
+
+                if args.output:
+                    record = dict(
+                        result,
+                        timestamp=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        python=sys.version.split()[0],
+                        provider=args.provider,
+                        background=bool(args.background),
+                        export_backend=args.export_backend or "",
+                        mock=asdict(settings)
+                    )
+                    with open(args.output, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record) + "\n")
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+    # Invalid runs are still printed and recorded, but fail the command so they are not mistaken for results
+    return 0 if all_valid else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
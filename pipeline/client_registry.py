@@ -0,0 +1,50 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+import groq
+from openai import OpenAI
+
+# How many distinct API keys keep a live client at once
+CLIENT_REGISTRY_MAX_ENTRIES = int(os.environ.get("VOICECANVAS_CLIENT_REGISTRY_MAX_ENTRIES", "32"))
+
+CLIENT_FACTORIES = {
+    "openai": lambda api_key: OpenAI(api_key=api_key),
+    "groq": lambda api_key: groq.Client(api_key=api_key),
+}
+
+# Clients live for the whole process, so Streamlit reruns and worker threads share their connection pools
+_clients = OrderedDict()  # (provider, key hash) -> client
+_clients_lock = threading.Lock()
+
+def _registry_key(provider, api_key):
+    return (provider, hashlib.sha256(api_key.encode("utf-8")).hexdigest())
+
+# Function to get the shared client for a provider and API key
+def get_provider_client(provider, api_key):
+    """Return the process-wide client for a provider and API key, creating it on first use."""
+    if not api_key:
+        return None
+    registry_key = _registry_key(provider, api_key)
+    with _clients_lock:
+        client = _clients.get(registry_key)
+        if client is None:
+            client = CLIENT_FACTORIES[provider](api_key)
+            _clients[registry_key] = client
+            # Least recently used keys are dropped; callers still holding them keep working
+            while len(_clients) > CLIENT_REGISTRY_MAX_ENTRIES:
+                _clients.popitem(last=False)
+        else:
+            _clients.move_to_end(registry_key)
+        return client
+
+# Function to get the shared OpenAI client for an API key
+def get_openai_client(api_key):
+    """Return the shared OpenAI client for an API key, or None if no key is given."""
+    return get_provider_client("openai", api_key)
+
+# Function to get the shared Groq client for an API key
+def get_groq_client(api_key):
+    """Return the shared Groq client for an API key, or None if no key is given."""
+    return get_provider_client("groq", api_key)
@@ -0,0 +1,143 @@
+import os
+import re
+import json
+import hashlib
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+
+# Location and size budget of the persistent clip cache
+CLIP_CACHE_DIR = os.environ.get(
+    "VOICECANVAS_CLIP_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "voicecanvas_clip_cache")
+)
+CLIP_CACHE_MAX_BYTES = int(os.environ.get("VOICECANVAS_CLIP_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+_cache_index = None  # path -> size, least recently used first
+
+# Function to normalize dialogue text before hashing
+def normalize_clip_text(text):
+    """Normalize unicode and whitespace so cosmetic edits do not change the cache key."""
+    text = unicodedata.normalize("NFC", text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+# Function to build the content address of a clip
+def clip_cache_key(provider, voice_id, model, settings, text):
+    """Return a stable hash of provider, voice, model, voice settings and normalized text."""
+    payload = json.dumps({
+        "provider": provider,
+        "voice_id": voice_id,
+        "model": model,
+        "settings": settings or {},
+        "text": normalize_clip_text(text)
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _clip_path(key):
+    return os.path.join(CLIP_CACHE_DIR, key[:2], f"{key}.mp3")
+
+# Function to look up a cached clip
+def get_cached_clip(key):
+    """Return the cached clip path for a key, or None on a miss."""
+    path = _clip_path(key)
+    with _cache_lock:
+        index = _load_index()
+        if path in index and os.path.exists(path):
+            _cache_stats["hits"] += 1
+            index.move_to_end(path)
+            try:
+                # Touch the file so a rebuilt index keeps the same order
+                os.utime(path, None)
+            except OSError:
+                pass
+            return path
+        index.pop(path, None)
+        _cache_stats["misses"] += 1
+    return None
+
+# Function to look up a cached clip as bytes
+def get_cached_clip_bytes(key):
+    """Return the cached clip audio bytes for a key, or None on a miss."""
+    path = get_cached_clip(key)
+    if not path:
+        return None
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+# Function to store a clip in the cache
+def store_clip(key, audio):
+    """Store clip audio (bytes or a file path) under a key and enforce the size budget."""
+    try:
+        if isinstance(audio, (bytes, bytearray)):
+            data = bytes(audio)
+        else:
+            with open(audio, "rb") as f:
+                data = f.read()
+        if not data:
+            return
+
+        path = _clip_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a sibling file first so readers never see a partial clip
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with _cache_lock:
+            index = _load_index()
+            index[path] = len(data)
+            index.move_to_end(path)
+            _cache_stats["stores"] += 1
+            _evict_clips(index)
+    except OSError:
+        # The cache is an optimization; failing to store must never fail generation
+        pass
+
+def _load_index():
+    global _cache_index
+    if _cache_index is None:
+        # Rebuild the LRU order from file modification times on first use
+        entries = []
+        for root, _, files in os.walk(CLIP_CACHE_DIR):
+            for name in files:
+                if not name.endswith(".mp3"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        entries.sort()
+        _cache_index = OrderedDict((path, size) for _, path, size in entries)
+    return _cache_index
+
+def _evict_clips(index):
+    # Drop least recently used clips until the cache fits its budget
+    total = sum(index.values())
+    while index and total > CLIP_CACHE_MAX_BYTES:
+        path, size = index.popitem(last=False)
+        total -= size
+        try:
+            os.remove(path)
+            _cache_stats["evictions"] += 1
+        except OSError:
+            pass
+
+# Function to read the clip cache counters
+def clip_cache_stats():
+    """Return a snapshot of cache hit, miss, store and eviction counters."""
+    with _cache_lock:
+        stats = dict(_cache_stats)
+        index = _load_index()
+        stats["entries"] = len(index)
+        stats["bytes"] = sum(index.values())
+        return stats
@@ -0,0 +1,128 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from pipeline.audio_assembly import remove_intermediate
+
+# MP3 audio of rendered lines kept in memory before the least recently used clips spill to temp files
+CLIP_STORE_MAX_BYTES = int(os.environ.get("VOICECANVAS_CLIP_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+class Clip:
+    """MP3 audio of one rendered line, held in memory by its ClipStore or, once spilled, in a temp file."""
+
+    def __init__(self, store, data):
+        self.store = store
+        self.size = len(data)
+        self.discarded = False
+        self._data = data
+        self._path = None
+
+    def exists(self):
+        """Return True while the clip's audio can still be read."""
+        return not self.discarded and (self._data is not None or os.path.exists(self._path))
+
+    def read(self):
+        """Return the clip's MP3 bytes."""
+        return self.store._read(self)
+
+    def path(self):
+        """Return a file holding the clip, spilling it there first if it is still in memory."""
+        return self.store._spill(self)
+
+    def detach(self):
+        """Spill the clip and hand its file to the caller, who deletes it, e.g. to pass it to another process."""
+        return self.store._detach(self)
+
+    def discard(self):
+        """Free the clip's memory or delete its file."""
+        self.store._discard(self)
+
+
+class ClipStore:
+    """Rendered clips as MP3 bytes in memory; above max_bytes the least recently used ones spill to temp files."""
+
+    def __init__(self, max_bytes=CLIP_STORE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.memory_bytes = 0
+        self._resident = OrderedDict()  # in-memory clip -> None, least recently used first
+        self._lock = threading.Lock()
+
+    def put(self, data):
+        """Keep MP3 bytes as a new clip and return it."""
+        clip = Clip(self, bytes(data))
+        with self._lock:
+            self._resident[clip] = None
+            self.memory_bytes += clip.size
+            # The oldest clips are written out until the budget is met again; a budget of 0 keeps every clip on disk
+            while self.memory_bytes > self.max_bytes and self._resident:
+                self._spill_locked(next(iter(self._resident)))
+        return clip
+
+    def adopt(self, path):
+        """Take over a clip file written elsewhere, e.g. by a job worker, as a new clip, deleting the file."""
+        with open(path, "rb") as f:
+            data = f.read()
+        remove_intermediate(path)
+        return self.put(data)
+
+    def _read(self, clip):
+        with self._lock:
+            if clip.discarded:
+                raise ValueError("clip was discarded")
+            if clip._data is not None:
+                self._resident.move_to_end(clip)
+                return clip._data
+            path = clip._path
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _spill(self, clip):
+        with self._lock:
+            if clip.discarded:
+                raise ValueError("clip was discarded")
+            if clip._data is not None:
+                self._spill_locked(clip)
+            return clip._path
+
+    def _spill_locked(self, clip):
+        fd, path = tempfile.mkstemp(suffix=".mp3")
+        with os.fdopen(fd, "wb") as f:
+            f.write(clip._data)
+        clip._path = path
+        clip._data = None
+        del self._resident[clip]
+        self.memory_bytes -= clip.size
+
+    def _detach(self, clip):
+        path = self._spill(clip)
+        with self._lock:
+            clip.discarded = True
+        return path
+
+    def _discard(self, clip):
+        with self._lock:
+            if clip.discarded:
+                return
+            clip.discarded = True
+            if clip._data is not None:
+                del self._resident[clip]
+                self.memory_bytes -= clip.size
+                clip._data = None
+            path = clip._path
+        remove_intermediate(path)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+# Function to get the process-wide clip store
+def get_clip_store():
+    """Return the shared clip store, creating it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ClipStore()
+    return _store
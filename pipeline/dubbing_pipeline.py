@@ -0,0 +1,142 @@
+import os
+import contextvars
+import queue
+import tempfile
+import threading
+
+from pydub import AudioSegment
+from pydub.silence import detect_nonsilent
+
+from pipeline.audio_assembly import assemble_clips_to_wav, encode_wav_to_mp3, remove_intermediate
+
+# Chunking parameters for splitting dubbing input on silences
+DUBBING_MAX_CHUNK_MS = int(os.environ.get("VOICECANVAS_DUBBING_MAX_CHUNK_MS", "45000"))
+DUBBING_MIN_SILENCE_MS = 500
+DUBBING_SILENCE_OFFSET_DB = -16
+DUBBING_QUEUE_SIZE = 2
+
+_STOP = object()
+
+# Function to split audio into chunks at silences
+def split_audio_on_silence(audio_file_path, max_chunk_ms=DUBBING_MAX_CHUNK_MS):
+    """Split audio into WAV chunks of at most max_chunk_ms, cutting in the middle of silences."""
+    audio = AudioSegment.from_file(audio_file_path)
+    total_ms = len(audio)
+
+    speech_ranges = detect_nonsilent(
+        audio,
+        min_silence_len=DUBBING_MIN_SILENCE_MS,
+        silence_thresh=audio.dBFS + DUBBING_SILENCE_OFFSET_DB
+    ) if total_ms else []
+    if not speech_ranges:
+        speech_ranges = [[0, total_ms]]
+
+    # Group speech ranges into chunks, cutting halfway through the silence between them
+    boundaries = [0]
+    chunk_start = 0
+    for i in range(1, len(speech_ranges)):
+        cut = (speech_ranges[i - 1][1] + speech_ranges[i][0]) // 2
+        if speech_ranges[i][1] - chunk_start > max_chunk_ms:
+            boundaries.append(cut)
+            chunk_start = cut
+    boundaries.append(total_ms)
+
+    chunk_paths = []
+    for start, end in zip(boundaries, boundaries[1:]):
+        # A single unbroken stretch of speech longer than the limit is hard-split
+        for piece_start in range(start, end, max_chunk_ms):
+            piece_end = min(piece_start + max_chunk_ms, end)
+            fd, chunk_path = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+            audio[piece_start:piece_end].export(chunk_path, format="wav")
+            chunk_paths.append(chunk_path)
+
+    return chunk_paths
+
+def _run_stage(work, inbox, outbox, errors):
+    while True:
+        item = inbox.get()
+        if item is _STOP:
+            outbox.put(_STOP)
+            return
+        index, value = item
+        if errors:
+            continue
+        try:
+            outbox.put((index, work(value)))
+        except Exception as e:
+            errors.append(e)
+
+# Function to run transcription, translation and synthesis as overlapping stages
+def run_dubbing_pipeline(chunk_paths, transcribe, translate, synthesize, on_chunk_ready=None,
+                         queue_size=DUBBING_QUEUE_SIZE):
+    """Pass every chunk through transcribe -> translate -> synthesize and return the outputs in chunk order."""
+    transcribe_queue = queue.Queue(maxsize=queue_size)
+    translate_queue = queue.Queue(maxsize=queue_size)
+    synthesize_queue = queue.Queue(maxsize=queue_size)
+    results_queue = queue.Queue()
+    errors = []
+
+    # Each stage runs in its own thread; bounded queues keep them at most a few chunks apart.
+    # Threads run in a copy of the caller's context so tracing spans reach the caller's trace.
+    stages = [
+        threading.Thread(target=contextvars.copy_context().run, args=(_run_stage, work, inbox, outbox, errors), daemon=True)
+        for work, inbox, outbox in (
+            (transcribe, transcribe_queue, translate_queue),
+            (translate, translate_queue, synthesize_queue),
+            (synthesize, synthesize_queue, results_queue)
+        )
+    ]
+    for stage in stages:
+        stage.start()
+
+    def feed():
+        for index, chunk_path in enumerate(chunk_paths):
+            transcribe_queue.put((index, chunk_path))
+        transcribe_queue.put(_STOP)
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+
+    # Results are collected on the calling thread so callbacks can touch the UI
+    outputs = [None] * len(chunk_paths)
+    while True:
+        item = results_queue.get()
+        if item is _STOP:
+            break
+        index, output = item
+        outputs[index] = output
+        if on_chunk_ready and output:
+            on_chunk_ready(index, len(chunk_paths), output)
+
+    feeder.join()
+    for stage in stages:
+        stage.join()
+
+    if errors:
+        # Remove partial outputs before surfacing the first failure
+        for output in outputs:
+            remove_intermediate(output)
+        raise errors[0]
+    return outputs
+
+# Function to dub a whole file through the chunked pipeline
+def dub_in_chunks(audio_file_path, transcribe, translate, synthesize, on_chunk_ready=None):
+    """Split audio on silences, dub the chunks through the stage pipeline and join the result into one MP3."""
+    chunk_paths = split_audio_on_silence(audio_file_path)
+    dubbed_paths = []
+    joined_wav = None
+    try:
+        dubbed_paths = run_dubbing_pipeline(chunk_paths, transcribe, translate, synthesize, on_chunk_ready)
+        ready_paths = [path for path in dubbed_paths if path]
+        if not ready_paths:
+            return None
+
+        joined_wav = assemble_clips_to_wav(ready_paths, pause_ms=0)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
+            output_path = temp_file.name
+        return encode_wav_to_mp3(joined_wav, output_path)
+    finally:
+        for path in chunk_paths + [path for path in dubbed_paths if path]:
+            remove_intermediate(path)
+        remove_intermediate(joined_wav)
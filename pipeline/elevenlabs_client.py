@@ -0,0 +1,82 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Overridable so the app and the benchmark can be pointed at a stand-in server
+ELEVENLABS_API_BASE = os.environ.get("ELEVENLABS_API_BASE", "https://api.elevenlabs.io/v1").rstrip("/")
+
+# Connection pool, timeout and retry settings for ElevenLabs requests
+ELEVENLABS_POOL_SIZE = int(os.environ.get("ELEVENLABS_POOL_SIZE", "10"))
+ELEVENLABS_CONNECT_TIMEOUT = float(os.environ.get("ELEVENLABS_CONNECT_TIMEOUT", "10"))
+ELEVENLABS_READ_TIMEOUT = float(os.environ.get("ELEVENLABS_READ_TIMEOUT", "120"))
+ELEVENLABS_MAX_RETRIES = int(os.environ.get("ELEVENLABS_MAX_RETRIES", "3"))
+ELEVENLABS_BACKOFF_FACTOR = float(os.environ.get("ELEVENLABS_BACKOFF_FACTOR", "0.5"))
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class ElevenLabsClient:
+    """Shared ElevenLabs HTTP client backed by a pooled keep-alive session."""
+
+    def __init__(self, pool_size=ELEVENLABS_POOL_SIZE, max_retries=ELEVENLABS_MAX_RETRIES,
+                 backoff_factor=ELEVENLABS_BACKOFF_FACTOR,
+                 timeout=(ELEVENLABS_CONNECT_TIMEOUT, ELEVENLABS_READ_TIMEOUT)):
+        self.timeout = timeout
+
+        # Retry rate limits and server errors with exponential backoff,
+        # honouring Retry-After when the API sends it. POST is left out: a voice clone or
+        # dubbing upload the server already acted on must not be sent twice. Connection
+        # failures are still retried for every method because nothing reached the server.
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["GET", "DELETE"]),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def url(self, path):
+        """Resolve an API path against the ElevenLabs base URL."""
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{ELEVENLABS_API_BASE}/{path.lstrip('/')}"
+
+    def request(self, method, path, **kwargs):
+        """Send a request through the pooled session with the default timeout."""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, self.url(path), **kwargs)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+# Function to get the process-wide ElevenLabs client
+def get_elevenlabs_client():
+    """Return the shared ElevenLabs client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ElevenLabsClient()
+    return _client
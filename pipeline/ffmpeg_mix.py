@@ -0,0 +1,146 @@
+import os
+import tempfile
+import subprocess
+
+from pydub import AudioSegment
+
+from pipeline.audio_assembly import DEFAULT_PAUSE_MS, assemble_clips_to_wav, remove_intermediate
+from pipeline.mp3_frames import parse_mp3_frames, silence_frames
+
+# Export backend used when a context does not choose one: "pydub" or "ffmpeg"
+EXPORT_BACKEND = os.environ.get("VOICECANVAS_EXPORT_BACKEND", "pydub")
+
+# PCM layout every stream is converted to inside the filter graph
+MIX_SAMPLE_RATE = 44100
+MIX_CHANNEL_LAYOUT = "stereo"
+
+def _format_filter():
+    # Mono is copied to both sides at full level, as pydub does, rather than ffmpeg's -3 dB upmix
+    return (
+        f"pan={MIX_CHANNEL_LAYOUT}|FL<FL+FC|FR<FR+FC,"
+        f"aresample={MIX_SAMPLE_RATE},aformat=sample_fmts=fltp:channel_layouts={MIX_CHANNEL_LAYOUT}"
+    )
+
+# Function to turn automation points into an ffmpeg volume expression
+def automation_expression(automation_points):
+    """Return a piecewise-linear ffmpeg expression of the gain over time t, matching gain_envelope."""
+    points = sorted(automation_points, key=lambda x: x["time"])
+    times = [float(p["time"]) for p in points]
+    volumes = [float(p["volume"]) for p in points]
+
+    # Volumes hold flat outside the points and are interpolated linearly between them
+    volume_expr = f"{volumes[-1]}"
+    for i in range(len(points) - 1, 0, -1):
+        t0, t1 = times[i - 1], times[i]
+        v0, v1 = volumes[i - 1], volumes[i]
+        segment = f"{v0}+({v1 - v0})*(t-{t0})/{max(t1 - t0, 1e-6)}"
+        volume_expr = f"if(lt(t,{t1}),{segment},{volume_expr})"
+    volume_expr = f"if(lt(t,{times[0]}),{volumes[0]},{volume_expr})"
+
+    # Same 0-1 volume to gain mapping as volume_to_gain (0 = -20 dB, 1 = 0 dB)
+    return f"pow(10,({volume_expr})-1)"
+
+# Function to build the filter graph for a mix
+def build_mix_filter(backgrounds, automation_points=None):
+    """Return the filter graph mixing looped background inputs under the narration, which is input 0."""
+    lines = [f"[0:a]{_format_filter()}[narration]"]
+    if not backgrounds:
+        lines.append("[narration]anull[out]")
+        return ";\n".join(lines)
+
+    mix_inputs = "[narration]"
+    for j, background in enumerate(backgrounds):
+        if automation_points and len(automation_points) >= 2:
+            volume = f"volume='{automation_expression(automation_points)}':eval=frame"
+        else:
+            # Convert 0-1 scale to dB reduction, as the pydub backend does
+            volume = f"volume={-(20 - background['volume'] * 20)}dB"
+        lines.append(f"[{j + 1}:a]{_format_filter()},{volume}[b{j}]")
+        mix_inputs += f"[b{j}]"
+
+    # Backgrounds loop forever; the mix ends with the narration
+    lines.append(
+        f"{mix_inputs}amix=inputs={len(backgrounds) + 1}:duration=first:dropout_transition=0:normalize=0[out]"
+    )
+    return ";\n".join(lines)
+
+def _shared_mp3_profile(narration_files):
+    # The concat demuxer needs one codec layout throughout, so only Layer III clips of one profile qualify
+    profile = None
+    for narration_file in narration_files:
+        with open(narration_file, "rb") as f:
+            parsed = parse_mp3_frames(f.read())
+        if parsed is None or parsed[0].layer != 3 or (profile is not None and parsed[0] != profile):
+            return None
+        profile = parsed[0]
+    return profile
+
+def _concat_entry(path):
+    escaped = os.path.abspath(path).replace("'", "'\\''")
+    return f"file '{escaped}'\n"
+
+# Function to write the narration as one concat demuxer input
+def write_narration_list(narration_files, pause_ms=DEFAULT_PAUSE_MS):
+    """Return a concat demuxer list of the clips with silent pauses between them, and the intermediates it uses.
+
+    Clips that are not MP3 of one profile are first streamed into a single WAV, which the list then names alone.
+    """
+    intermediates = []
+    profile = _shared_mp3_profile(narration_files)
+    if profile is None:
+        wav_path = assemble_clips_to_wav(narration_files, pause_ms=pause_ms)
+        intermediates.append(wav_path)
+        entries = [_concat_entry(wav_path)]
+    else:
+        pause_entry = None
+        if pause_ms and len(narration_files) > 1:
+            frame, count, _ = silence_frames(profile, pause_ms)
+            fd, pause_path = tempfile.mkstemp(suffix=".mp3")
+            with os.fdopen(fd, "wb") as f:
+                f.write(frame * count)
+            intermediates.append(pause_path)
+            pause_entry = _concat_entry(pause_path)
+        entries = []
+        for i, narration_file in enumerate(narration_files):
+            if i and pause_entry:
+                entries.append(pause_entry)
+            entries.append(_concat_entry(narration_file))
+
+    fd, list_path = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write("ffconcat version 1.0\n")
+        f.writelines(entries)
+    return list_path, intermediates
+
+# Function to render the whole mix with one ffmpeg process
+def render_mix_with_ffmpeg(narration_files, output_path, backgrounds=None, pause_ms=DEFAULT_PAUSE_MS,
+                           automation_points=None, bitrate=None):
+    """Join narration files with pauses, mix looped backgrounds and encode an MP3 in a single ffmpeg run.
+
+    backgrounds is a list of {"path", "volume"} dicts. The narration is read through the concat demuxer as one input,
+    so ffmpeg holds one decoder however many clips there are, and audio streams through the filter graph.
+    """
+    backgrounds = backgrounds or []
+    list_path, intermediates = write_narration_list(narration_files, pause_ms)
+    command = [AudioSegment.converter, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path]
+    for background in backgrounds:
+        command += ["-stream_loop", "-1", "-i", background["path"]]
+
+    # The graph is passed as a script file, since automation expressions can get long
+    fd, filter_path = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(build_mix_filter(backgrounds, automation_points))
+
+    command += ["-filter_complex_script", filter_path, "-map", "[out]", "-f", "mp3"]
+    if bitrate:
+        command += ["-b:a", bitrate]
+    command.append(output_path)
+
+    try:
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    finally:
+        for path in [filter_path, list_path] + intermediates:
+            remove_intermediate(path)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to render the mix: {result.stderr.decode(errors='ignore').strip()}")
+    return output_path
@@ -0,0 +1,41 @@
+import numpy as np
+
+# Function to convert a 0-1 volume to a linear gain
+def volume_to_gain(volume):
+    """Map the UI's 0-1 volume scale (0 = -20 dB, 1 = 0 dB) to a linear amplitude gain."""
+    # 20 * (volume - 1) dB expressed as an amplitude ratio
+    return np.power(10.0, np.asarray(volume, dtype=np.float64) - 1.0)
+
+# Function to build a per-frame gain curve from automation points
+def build_gain_envelope(automation_points, frame_count, frame_rate, start_frame=0):
+    """Interpolate automation points into a float32 gain value for each audio frame."""
+    points = sorted(automation_points, key=lambda x: x["time"])
+    point_frames = np.array([float(p["time"]) * frame_rate for p in points], dtype=np.float64)
+    point_volumes = np.array([float(p["volume"]) for p in points], dtype=np.float64)
+
+    # Volumes are interpolated linearly between points and held flat outside them
+    positions = np.arange(start_frame, start_frame + frame_count, dtype=np.float64)
+    volumes = np.interp(positions, point_frames, point_volumes)
+    return volume_to_gain(volumes).astype(np.float32)
+
+# Function to apply a gain curve to interleaved PCM samples
+def apply_gain_to_samples(samples, gain, channels):
+    """Multiply interleaved integer samples by a per-frame gain and clip to the sample range."""
+    limits = np.iinfo(samples.dtype)
+    frames = samples.reshape(-1, channels).astype(np.float32)
+    frames *= gain[:, np.newaxis]
+    np.clip(frames, limits.min, limits.max, out=frames)
+    return frames.astype(samples.dtype).reshape(-1)
+
+# Function to apply volume automation to an AudioSegment
+def apply_gain_envelope(audio_segment, automation_points):
+    """Apply sample-accurate volume automation to an AudioSegment in one vectorized pass."""
+    samples = np.array(audio_segment.get_array_of_samples())
+    channels = audio_segment.channels
+    frame_count = len(samples) // channels
+    if frame_count == 0:
+        return audio_segment
+
+    gain = build_gain_envelope(automation_points, frame_count, audio_segment.frame_rate)
+    processed = apply_gain_to_samples(samples[:frame_count * channels], gain, channels)
+    return audio_segment._spawn(processed.tobytes())
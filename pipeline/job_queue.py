@@ -0,0 +1,256 @@
+# Persistent render-job queue: jobs live in SQLite and run in worker processes, independent of Streamlit reruns
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import argparse
+import tempfile
+import importlib
+import threading
+import multiprocessing
+
+from pipeline.tracing import flush_metrics
+
+# Location of the queue database, shared by the app and every worker process
+JOB_QUEUE_PATH = os.environ.get(
+    "VOICECANVAS_JOB_QUEUE_PATH",
+    os.path.join(tempfile.gettempdir(), "voicecanvas_jobs.sqlite3")
+)
+# Worker processes the app starts on first use; 0 leaves the jobs to workers started with this module's CLI
+JOB_WORKERS = int(os.environ.get("VOICECANVAS_JOB_WORKERS", str(min(4, os.cpu_count() or 1))))
+JOB_POLL_SECONDS = float(os.environ.get("VOICECANVAS_JOB_POLL_SECONDS", "0.5"))
+# A running job whose worker has not reported for this long is handed to another worker
+JOB_STALE_SECONDS = int(os.environ.get("VOICECANVAS_JOB_STALE_SECONDS", "120"))
+JOB_MAX_ATTEMPTS = 3
+JOB_RETENTION_SECONDS = int(os.environ.get("VOICECANVAS_JOB_RETENTION_SECONDS", str(24 * 60 * 60)))
+JOB_HEARTBEAT_SECONDS = 1.0
+
+# Handler for each job kind as "module:function"; handlers are called as handler(payload, report_progress)
+JOB_HANDLERS = {
+    "render": "pipeline.render_jobs:run_render_job",
+    "dub": "pipeline.render_jobs:run_dub_job",
+}
+
+ACTIVE_STATUSES = ("queued", "running")
+
+_workers = []
+_workers_lock = threading.Lock()
+
+def _connect(path=None):
+    path = path or JOB_QUEUE_PATH
+    is_new = not os.path.exists(path)
+    connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    # Cleared payloads are zeroed on disk instead of lingering in free pages
+    connection.execute("PRAGMA secure_delete=ON")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, payload TEXT NOT NULL, "
+        "result TEXT, error TEXT, progress REAL NOT NULL DEFAULT 0, message TEXT, "
+        "attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, started_at REAL, "
+        "heartbeat REAL, finished_at REAL)"
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+    if is_new:
+        # Payloads carry API keys until the job finishes
+        try:
+            os.chmod(path, 0o600)
+        except OSError:
+            pass
+    return connection
+
+# Function to queue a job
+def submit_job(kind, payload):
+    """Store a job for the worker pool and return its ID. The payload must be JSON serializable."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    connection = _connect()
+    try:
+        connection.execute(
+            "INSERT INTO jobs (id, kind, status, payload, created_at) VALUES (?, ?, 'queued', ?, ?)",
+            (job_id, kind, json.dumps(payload), now)
+        )
+        # Finished jobs are kept for a day so their results can still be collected
+        connection.execute(
+            "DELETE FROM jobs WHERE status NOT IN ('queued', 'running') AND finished_at < ?",
+            (now - JOB_RETENTION_SECONDS,)
+        )
+    finally:
+        connection.close()
+    ensure_workers()
+    return job_id
+
+# Function to look up a job
+def get_job(job_id):
+    """Return a job's status, progress, message, result and error, or None if it does not exist."""
+    connection = _connect()
+    try:
+        row = connection.execute(
+            "SELECT id, kind, status, result, error, progress, message, created_at, started_at, finished_at "
+            "FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+    finally:
+        connection.close()
+    if row is None:
+        return None
+    job = dict(row)
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+def _drop_cleared_pages(connection):
+    # The write-ahead log keeps the pages holding a cleared payload until it is checkpointed and truncated
+    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+def _claim_job(connection):
+    # Takes the oldest queued job, or one abandoned by a dead worker, inside a write transaction
+    now = time.time()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        row = connection.execute(
+            "SELECT id, kind, payload, attempts FROM jobs "
+            "WHERE status = 'queued' OR (status = 'running' AND heartbeat < ?) "
+            "ORDER BY created_at LIMIT 1",
+            (now - JOB_STALE_SECONDS,)
+        ).fetchone()
+        if row is None:
+            connection.execute("COMMIT")
+            return None
+        if row["attempts"] >= JOB_MAX_ATTEMPTS:
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', payload = '{}', error = ?, finished_at = ? WHERE id = ?",
+                (f"Job stopped after {row['attempts']} attempts without finishing.", now, row["id"])
+            )
+            connection.execute("COMMIT")
+            _drop_cleared_pages(connection)
+            return None
+        connection.execute(
+            "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, heartbeat = ? WHERE id = ?",
+            (now, now, row["id"])
+        )
+        connection.execute("COMMIT")
+        return row
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+
+def _finish_job(connection, job_id, result=None, error=None):
+    # The payload is cleared so API keys do not outlive the job
+    connection.execute(
+        "UPDATE jobs SET status = ?, payload = '{}', result = ?, error = ?, progress = ?, finished_at = ? WHERE id = ?",
+        (
+            "failed" if error else "done",
+            None if error else json.dumps(result),
+            error,
+            0 if error else 1,
+            time.time(),
+            job_id
+        )
+    )
+    _drop_cleared_pages(connection)
+
+def _resolve_handler(kind):
+    module_name, function_name = JOB_HANDLERS[kind].split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+def _run_job(path, job):
+    # Progress reported by the handler is written together with the heartbeat from a side thread
+    state = {"progress": 0.0, "message": None}
+    state_lock = threading.Lock()
+    done = threading.Event()
+
+    def report_progress(progress, message=None):
+        with state_lock:
+            state["progress"] = progress
+            state["message"] = message
+
+    def heartbeat():
+        connection = _connect(path)
+        try:
+            while not done.wait(JOB_HEARTBEAT_SECONDS):
+                with state_lock:
+                    progress, message = state["progress"], state["message"]
+                connection.execute(
+                    "UPDATE jobs SET progress = ?, message = ?, heartbeat = ? WHERE id = ? AND status = 'running'",
+                    (progress, message, time.time(), job["id"])
+                )
+        finally:
+            connection.close()
+
+    beat = threading.Thread(target=heartbeat, name=f"job-heartbeat-{job['id'][:8]}", daemon=True)
+    beat.start()
+    try:
+        result = _resolve_handler(job["kind"])(json.loads(job["payload"]), report_progress)
+        return result, None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {str(e)}"
+    finally:
+        done.set()
+        beat.join()
+
+# Function to run a worker loop
+def run_worker(path=None, stop_event=None):
+    """Claim and run queued jobs until stop_event is set (or forever)."""
+    path = path or JOB_QUEUE_PATH
+    connection = _connect(path)
+    try:
+        while not (stop_event and stop_event.is_set()):
+            job = _claim_job(connection)
+            if job is None:
+                time.sleep(JOB_POLL_SECONDS)
+                continue
+            result, error = _run_job(path, job)
+            _finish_job(connection, job["id"], result, error)
+            # Daemon workers are terminated with the app, so exit handlers cannot be relied on
+            flush_metrics()
+    finally:
+        connection.close()
+
+# Function to start the app's worker processes
+def ensure_workers(count=None):
+    """Start (or restart) the worker processes shared by every session of this server."""
+    count = JOB_WORKERS if count is None else count
+    with _workers_lock:
+        _workers[:] = [worker for worker in _workers if worker.is_alive()]
+        # Spawned rather than forked, so workers do not inherit the server's threads
+        context = multiprocessing.get_context("spawn")
+        while len(_workers) < count:
+            worker = context.Process(
+                target=run_worker,
+                args=(JOB_QUEUE_PATH,),
+                name=f"voicecanvas-job-worker-{len(_workers)}",
+                daemon=True
+            )
+            worker.start()
+            _workers.append(worker)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run VoiceCanvas job workers outside the Streamlit server.")
+    parser.add_argument("--workers", type=int, default=max(JOB_WORKERS, 1), help="Number of worker processes")
+    parser.add_argument("--queue", default=JOB_QUEUE_PATH, help="Path of the job queue database")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=run_worker, args=(args.queue,), name=f"voicecanvas-job-worker-{i}")
+        for i in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import os
+import re
+from io import BytesIO
+
+from pydub import AudioSegment
+from pydub.silence import detect_silence, detect_leading_silence
+
+from pipeline.mp3_frames import parse_mp3_frames
+
+# Longest text each provider accepts in one TTS request
+PROVIDER_CHAR_LIMITS = {
+    "openai": int(os.environ.get("OPENAI_TTS_MAX_CHARS", "4096")),
+    "elevenlabs": int(os.environ.get("ELEVENLABS_TTS_MAX_CHARS", "2500")),
+}
+DEFAULT_CHAR_LIMIT = 1000
+
+# Merging is opt-in: a pause inside a line can be mistaken for the one between lines
+TTS_BATCH_DEFAULT = os.environ.get("VOICECANVAS_TTS_BATCH", "0") == "1"
+
+# How many consecutive lines may share one request
+TTS_BATCH_MAX_LINES = int(os.environ.get("VOICECANVAS_TTS_BATCH_MAX_LINES", "6"))
+
+# Text placed between merged lines so the provider leaves an audible pause there
+BATCH_PAUSE_MARKERS = {
+    "openai": "\n\n",
+    "elevenlabs": ' <break time="1.0s" /> ',
+}
+
+# Silence detection used to cut merged audio back into lines
+BATCH_MIN_SILENCE_MS = 350
+BATCH_SILENCE_OFFSET_DB = -16
+BATCH_EDGE_SILENCE_MS = 100
+
+# A cut piece is accepted when its speech lasts within this factor (plus slack) of its share of the batch's
+# characters; anything further off means a cut landed inside a line
+BATCH_SPLIT_TOLERANCE = 1.75
+BATCH_SPLIT_SLACK_MS = 400
+
+_PAUSE_MARKUP = re.compile(r"\s*<break[^>]*/>\s*")
+
+def _batch_key(job):
+    return (job.get("provider"), job.get("voice_id"), job.get("character"), job.get("emotion"))
+
+def _pause_marker(provider):
+    return BATCH_PAUSE_MARKERS.get(provider, "\n\n")
+
+# Function to join the lines of a batch into one request text
+def batch_text(lines):
+    """Return the dialogue of a batch joined with the provider's pause marker."""
+    return _pause_marker(lines[0].get("provider")).join(line["dialogue"] for line in lines)
+
+# Function to show a batch's text without its pause markup
+def display_text(job):
+    """Return the dialogue of a line or batch job as plain text, with pause markers replaced by spaces."""
+    return " ".join(_PAUSE_MARKUP.sub(" ", line["dialogue"]).strip() for line in job.get("lines", [job]))
+
+# Function to group adjacent same-voice lines into batches
+def plan_batches(jobs, max_lines=TTS_BATCH_MAX_LINES, char_limits=None):
+    """Group consecutive jobs with the same provider, voice, character and emotion into batch jobs.
+
+    Each batch job carries its original jobs under "lines"; single lines are batches of one.
+    """
+    limits = dict(PROVIDER_CHAR_LIMITS)
+    if char_limits:
+        limits.update(char_limits)
+
+    batches = []
+    current = []
+    for job in jobs:
+        if current:
+            limit = limits.get(job.get("provider"), DEFAULT_CHAR_LIMIT)
+            fits = len(batch_text(current + [job])) <= limit
+            adjacent = job["index"] == current[-1]["index"] + 1
+            if _batch_key(job) == _batch_key(current[0]) and adjacent and fits and len(current) < max_lines:
+                current.append(job)
+                continue
+            batches.append(current)
+        current = [job]
+    if current:
+        batches.append(current)
+
+    return [dict(lines[0], dialogue=batch_text(lines), lines=lines) for lines in batches]
+
+def _speech_bounds(segment, silence_thresh):
+    # Keep a little of the pause on each side so words are not clipped
+    start = max(0, detect_leading_silence(segment, silence_threshold=silence_thresh) - BATCH_EDGE_SILENCE_MS)
+    end = max(0, detect_leading_silence(segment.reverse(), silence_threshold=silence_thresh) - BATCH_EDGE_SILENCE_MS)
+    return start, max(start, len(segment) - end)
+
+def _plausible_split(pieces, texts):
+    # The batch's own speaking rate gives each line an expected length
+    speech_ms = sum(end - start for start, end in pieces)
+    chars = sum(len(text) for text in texts)
+    if not speech_ms or not chars:
+        return False
+    ms_per_char = speech_ms / chars
+    for (start, end), text in zip(pieces, texts):
+        expected = len(text) * ms_per_char
+        if not expected / BATCH_SPLIT_TOLERANCE - BATCH_SPLIT_SLACK_MS <= end - start <= expected * BATCH_SPLIT_TOLERANCE + BATCH_SPLIT_SLACK_MS:
+            return False
+    return True
+
+# Function to cut merged audio back into one clip per line
+def split_batch_audio(audio_bytes, texts):
+    """Split a batch's MP3 bytes at its longest inner silences into the MP3 bytes of each line of texts, or return None.
+
+    Clips are cut on the stream's own frame boundaries, so they are not re-encoded. None is returned when the
+    pauses cannot be found or a piece's length does not match its line, and the lines should be voiced one by one.
+    """
+    if len(texts) == 1:
+        return [audio_bytes]
+
+    parsed = parse_mp3_frames(audio_bytes)
+    if parsed is None:
+        return None
+    profile, frames, sample_count = parsed
+
+    audio = AudioSegment.from_file(BytesIO(audio_bytes))
+    silence_thresh = audio.dBFS + BATCH_SILENCE_OFFSET_DB
+    silences = detect_silence(audio, min_silence_len=BATCH_MIN_SILENCE_MS, silence_thresh=silence_thresh)
+
+    # Only pauses between speech can separate lines
+    inner = [silence for silence in silences if silence[0] > 0 and silence[1] < len(audio)]
+    if len(inner) < len(texts) - 1:
+        return None
+
+    # The inserted pauses are the longest ones; cut in their middle
+    longest = sorted(sorted(inner, key=lambda silence: silence[1] - silence[0], reverse=True)[:len(texts) - 1])
+    cuts = [0] + [(start + end) // 2 for start, end in longest] + [len(audio)]
+    pieces = []
+    for start, end in zip(cuts, cuts[1:]):
+        speech_start, speech_end = _speech_bounds(audio[start:end], silence_thresh)
+        pieces.append((start + speech_start, start + speech_end))
+    if not _plausible_split(pieces, texts):
+        return None
+
+    # Cuts fall in silence, where a frame borrowing bits from the one before it decodes to nothing audible
+    ms_per_frame = sample_count / len(frames) / profile.sample_rate * 1000
+    return [b"".join(frames[int(start // ms_per_frame):int(-(-end // ms_per_frame))]) for start, end in pieces]
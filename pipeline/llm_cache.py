@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Location, lifetime and size of the shared LLM response cache
+LLM_CACHE_PATH = os.environ.get(
+    "VOICECANVAS_LLM_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "voicecanvas_llm_cache.sqlite3")
+)
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("VOICECANVAS_LLM_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("VOICECANVAS_LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_MEMORY_CACHE_ENTRIES = 256
+
+# Version of each cached prompt template. Each caller uses its own prompt ID, so two prompts never share keys;
+# bump a version when its prompt text changes so earlier results are not reused
+PROMPT_VERSIONS = {
+    "dialogue_json": "1",  # app.py: paragraph to a JSON list of character lines
+    "dialogue_lines": "1",  # services.py: paragraph to "Character (emotion): line" text
+    "tone_analysis": "1",
+}
+
+_llm_lock = threading.Lock()
+_llm_connection = None
+_memory_cache = OrderedDict()  # key -> (expires_at, JSON text), decoded afresh for every caller
+_llm_stats = {"hits": 0, "misses": 0}
+
+def _connection():
+    global _llm_connection
+    if _llm_connection is None:
+        _llm_connection = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False)
+        _llm_connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        _llm_connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        _llm_connection.commit()
+    return _llm_connection
+
+def _remember(key, expires_at, value_json):
+    _memory_cache[key] = (expires_at, value_json)
+    _memory_cache.move_to_end(key)
+    while len(_memory_cache) > LLM_MEMORY_CACHE_ENTRIES:
+        _memory_cache.popitem(last=False)
+
+# Function to build the cache key for an LLM request
+def llm_cache_key(model, prompt, temperature, text, extra=None):
+    """Return a stable hash of model, prompt ID and its PROMPT_VERSIONS entry, temperature and input text."""
+    payload = json.dumps({
+        "model": model,
+        "prompt": prompt,
+        "template_version": PROMPT_VERSIONS[prompt],
+        "temperature": temperature,
+        "text_sha256": hashlib.sha256((text or "").encode("utf-8")).hexdigest(),
+        "extra": extra
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# Function to look up a cached LLM response
+def get_cached_response(key):
+    """Return the cached response for a key, or None if it is missing or expired.
+
+    Every call returns a new object, so callers may modify it without affecting the cache.
+    """
+    now = time.time()
+    with _llm_lock:
+        entry = _memory_cache.get(key)
+        if entry and entry[0] > now:
+            _memory_cache.move_to_end(key)
+            _llm_stats["hits"] += 1
+            return json.loads(entry[1])
+
+        try:
+            connection = _connection()
+            row = connection.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and row[1] > now:
+                connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                connection.commit()
+                _remember(key, row[1], row[0])
+                _llm_stats["hits"] += 1
+                return json.loads(row[0])
+        except sqlite3.Error:
+            pass
+
+        _memory_cache.pop(key, None)
+        _llm_stats["misses"] += 1
+    return None
+
+# Function to store an LLM response
+def store_response(key, value):
+    """Store a JSON-serializable response and trim expired and least recently used entries."""
+    now = time.time()
+    expires_at = now + LLM_CACHE_TTL_SECONDS
+    # Serialized up front, so later changes to value by the caller do not leak into the cache
+    value_json = json.dumps(value)
+    with _llm_lock:
+        _remember(key, expires_at, value_json)
+        try:
+            connection = _connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value_json, expires_at, now)
+            )
+            connection.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            connection.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (LLM_CACHE_MAX_ENTRIES,)
+            )
+            connection.commit()
+        except sqlite3.Error:
+            # The cache is an optimization; failing to persist must never fail the request
+            pass
+
+# Function to read the LLM cache counters
+def llm_cache_stats():
+    """Return a snapshot of LLM cache hit and miss counters."""
+    with _llm_lock:
+        return dict(_llm_stats)
@@ -0,0 +1,101 @@
+import os
+import wave
+import struct
+import tempfile
+
+import numpy as np
+
+from pipeline.background_bed import SAMPLE_DTYPES
+from pipeline.gain_envelope import build_gain_envelope
+
+# Frames mixed per step; memory use depends on this, not on the narration length
+MIX_CHUNK_FRAMES = int(os.environ.get("VOICECANVAS_MIX_CHUNK_FRAMES", str(1 << 16)))
+
+# Function to read the sample layout of a PCM WAV file
+def wav_layout(wav_path):
+    """Return the channels, sample width, frame rate, frame count and data offset of a PCM WAV file."""
+    with wave.open(wav_path, "rb") as reader:
+        layout = {
+            "channels": reader.getnchannels(),
+            "sample_width": reader.getsampwidth(),
+            "frame_rate": reader.getframerate(),
+            "frame_count": reader.getnframes()
+        }
+
+    # Walk the RIFF chunks to find where the sample data starts
+    with open(wav_path, "rb") as f:
+        f.seek(12)
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"No data chunk in {wav_path}")
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+            if chunk_id == b"data":
+                layout["offset"] = f.tell()
+                return layout
+            f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+# Function to memory-map a window of a PCM WAV file
+def map_wav_frames(wav_path, layout, start, count):
+    """Return a read-only (count, channels) memory map of frames start..start+count of a WAV file.
+
+    Only the window is mapped, so resident memory stays at one chunk however long the file is.
+    """
+    channels = layout["channels"]
+    frame_bytes = channels * layout["sample_width"]
+    samples = np.memmap(wav_path, dtype=SAMPLE_DTYPES[layout["sample_width"]], mode="r",
+                        offset=layout["offset"] + start * frame_bytes, shape=(count * channels,))
+    return samples.reshape(-1, channels)
+
+def _match_channels(frames, channels):
+    # Mono is copied to every channel, as pydub's overlay does
+    if frames.shape[1] == channels:
+        return frames
+    return np.repeat(frames[:, :1], channels, axis=1)
+
+# Function to mix background beds under a narration WAV chunk by chunk
+def mix_beds_into_wav(narration_wav, beds, output_wav=None, automation_points=None, chunk_frames=MIX_CHUNK_FRAMES):
+    """Overlay (bed, volume) pairs on a memory-mapped narration WAV and write the sum to a WAV file.
+
+    Beds must share the narration's frame rate and sample width. With two or more automation points the
+    envelope replaces the flat volumes, matching the in-memory path.
+    """
+    layout = wav_layout(narration_wav)
+    frame_rate = layout["frame_rate"]
+    sample_width = layout["sample_width"]
+    frame_count = layout["frame_count"]
+    channels = max([layout["channels"]] + [bed.channels for bed, _ in beds])
+    dtype = SAMPLE_DTYPES[sample_width]
+    limits = np.iinfo(dtype)
+    use_automation = bool(automation_points) and len(automation_points) >= 2
+
+    if output_wav is None:
+        fd, output_wav = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+
+    with wave.open(output_wav, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(sample_width)
+        writer.setframerate(frame_rate)
+
+        for start in range(0, frame_count, chunk_frames):
+            count = min(chunk_frames, frame_count - start)
+            narration = map_wav_frames(narration_wav, layout, start, count)
+            mixed = _match_channels(narration, channels).astype(np.float32)
+            del narration
+
+            if use_automation:
+                gain = build_gain_envelope(automation_points, count, frame_rate, start_frame=start)[:, np.newaxis]
+            for bed, volume in beds:
+                bed_frames = _match_channels(bed.frames(start, count), channels).astype(np.float32)
+                if use_automation:
+                    bed_frames *= gain
+                else:
+                    # Convert 0-1 scale to dB reduction
+                    bed_frames *= 10 ** (-(20 - volume * 20) / 20)
+                mixed += bed_frames
+
+            np.clip(mixed, limits.min, limits.max, out=mixed)
+            writer.writeframes(mixed.astype(dtype).tobytes())
+
+    return output_wav
@@ -0,0 +1,263 @@
+# Local stand-in for the ElevenLabs, OpenAI and Groq endpoints the pipeline calls, for offline benchmarks
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pipeline.mp3_frames import Mp3Profile, silence_frames
+
+# Clips are silent 44.1 kHz mono MP3 at 128 kbit/s, the format the real providers return
+MOCK_AUDIO_PROFILE = Mp3Profile("1", 3, 44100, 1)
+MOCK_AUDIO_BITRATE = 128000
+# Roughly the pace of natural speech
+MOCK_SPEECH_MS_PER_CHAR = 65
+MOCK_SPEAKERS = ("Narrator", "Anna", "Ben")
+
+MOCK_VOICES = [
+    {"voice_id": "mock-voice-rachel", "name": "Rachel", "category": "premade", "labels": {"accent": "american"}},
+    {"voice_id": "mock-voice-adam", "name": "Adam", "category": "premade", "labels": {"accent": "american"}},
+    {"voice_id": "mock-voice-clone", "name": "My Clone", "category": "cloned", "labels": {}}
+]
+
+
+@dataclass
+class MockSettings:
+    """Response timing and fault injection of the mock server."""
+    latency_ms: float = 100.0
+    jitter_ms: float = 50.0
+    # Extra generation time per input character on speech endpoints
+    ms_per_char: float = 0.5
+    # Fraction of requests answered with 500 and with 429
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after_seconds: int = 1
+    # Whether chat completions (dialogue conversion) get faults too; off, so a benchmark script keeps its size
+    chat_faults: bool = False
+    # Advertised in the x-ratelimit-limit-requests header
+    rpm: int = 10000
+    seed: int = 0
+
+
+class MockApiServer:
+    """Threaded HTTP server answering provider API calls with canned responses, usable as a context manager."""
+
+    def __init__(self, settings=None, host="127.0.0.1", port=0):
+        self.settings = settings or MockSettings()
+        self.random = random.Random(self.settings.seed)
+        self.stats = {}  # endpoint -> {"requests", "rate_limited", "errors"}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _MockHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-api-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def client_environment(self):
+        """Return the environment variables that point the provider clients at this server."""
+        return {
+            "ELEVENLABS_API_BASE": f"{self.url}/v1",
+            "OPENAI_BASE_URL": f"{self.url}/v1",
+            "GROQ_BASE_URL": self.url
+        }
+
+    def draw_fault(self, endpoint, chars):
+        # Returns the response delay in seconds and the fault status (429, 500 or None) for one request
+        settings = self.settings
+        with self._lock:
+            delay_ms = settings.latency_ms + self.random.uniform(-settings.jitter_ms, settings.jitter_ms)
+            roll = self.random.random()
+            if endpoint.endswith(".chat") and not settings.chat_faults:
+                roll = 1.0
+            stats = self.stats.setdefault(endpoint, {"requests": 0, "rate_limited": 0, "errors": 0})
+            stats["requests"] += 1
+            status = None
+            if roll < settings.rate_limit_rate:
+                status = 429
+                stats["rate_limited"] += 1
+            elif roll < settings.rate_limit_rate + settings.error_rate:
+                status = 500
+                stats["errors"] += 1
+        return max(0.0, delay_ms + chars * settings.ms_per_char) / 1000, status
+
+    def take_stats(self):
+        """Return the request counts per endpoint since the last call and start counting afresh."""
+        with self._lock:
+            stats, self.stats = self.stats, {}
+        return stats
+
+# Function to build a silent MP3 as long as speaking text would take
+def mock_speech(text):
+    """Return MP3 bytes of silence lasting about as long as text takes to say."""
+    duration_ms = max(300, len(text) * MOCK_SPEECH_MS_PER_CHAR)
+    frame, count, _ = silence_frames(MOCK_AUDIO_PROFILE, duration_ms, MOCK_AUDIO_BITRATE)
+    return frame * count
+
+# Function to answer a chat completion
+def mock_chat_reply(messages):
+    """Turn a dialogue conversion prompt into one "Character (emotion): line" per sentence, or echo the text."""
+    prompt = next((message.get("content") or "" for message in reversed(messages) if message.get("role") == "user"), "")
+    match = re.search(r"Paragraph:(.*?)(?:Please return only|$)", prompt, re.S)
+    if match:
+        sentences = [s for s in re.split(r"(?<=[.!?])\s+", match.group(1).strip()) if s]
+        return "\n".join(f"{MOCK_SPEAKERS[i % len(MOCK_SPEAKERS)]} (neutral): {s}" for i, s in enumerate(sentences))
+    # Translation prompts put the text after a blank line
+    return prompt.rsplit("\n\n", 1)[-1].strip()
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/v1/voices":
+            self._respond("voices", 0, lambda: self._send_json({"voices": MOCK_VOICES}))
+        else:
+            self._send_json({"detail": "Not found"}, 404)
+
+    def do_POST(self):
+        path = self.path.split("?")[0].rstrip("/")
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        if re.fullmatch(r"/v1/text-to-speech/[^/]+(/stream)?", path):
+            text = json.loads(body or b"{}").get("text", "")
+            self._respond("elevenlabs.tts", len(text), lambda: self._send_audio(mock_speech(text)))
+        elif path == "/v1/audio/speech":
+            text = json.loads(body or b"{}").get("input", "")
+            self._respond("openai.speech", len(text), lambda: self._send_audio(mock_speech(text)))
+        elif path == "/v1/audio/transcriptions":
+            transcript = "This is a mock transcript of the uploaded audio."
+            if re.search(rb'name="response_format"\r\n\r\ntext\r\n', body):
+                send = lambda: self._send_bytes(transcript.encode("utf-8"), "text/plain; charset=utf-8")
+            else:
+                send = lambda: self._send_json({"text": transcript})
+            self._respond("openai.transcription", 0, send)
+        elif path in ("/v1/chat/completions", "/openai/v1/chat/completions"):
+            request = json.loads(body or b"{}")
+            endpoint = "groq.chat" if path.startswith("/openai") else "openai.chat"
+            self._respond(endpoint, 0, lambda: self._send_json(self._completion(request)))
+        else:
+            self._send_json({"detail": "Not found"}, 404)
+
+    def _respond(self, endpoint, chars, send):
+        mock = self.server.mock
+        delay, status = mock.draw_fault(endpoint, chars)
+        time.sleep(delay)
+        if status == 429:
+            # Integer seconds for urllib3, milliseconds for the OpenAI SDK
+            retry_after = mock.settings.retry_after_seconds
+            self._send_json({"error": {"message": "Rate limit exceeded", "type": "rate_limit"}}, 429, {
+                "Retry-After": str(retry_after),
+                "retry-after-ms": str(retry_after * 1000)
+            })
+        elif status == 500:
+            self._send_json({"error": {"message": "Injected server error", "type": "server_error"}}, 500)
+        else:
+            send()
+
+    def _completion(self, request):
+        content = mock_chat_reply(request.get("messages") or [])
+        return {
+            "id": f"chatcmpl-mock-{time.time_ns()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+
+    def _send_audio(self, audio):
+        self._send_bytes(audio, "audio/mpeg")
+
+    def _send_json(self, payload, status=200, headers=None):
+        self._send_bytes(json.dumps(payload).encode("utf-8"), "application/json", status, headers)
+
+    def _send_bytes(self, body, content_type, status=200, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("x-ratelimit-limit-requests", str(self.server.mock.settings.rpm))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+# Function to add the mock settings to a command line parser
+def add_settings_arguments(parser):
+    """Add --latency-ms, --jitter-ms, --ms-per-char, --error-rate, --rate-limit-rate, --chat-faults, --rpm and --seed."""
+    defaults = MockSettings()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Mean response delay")
+    parser.add_argument("--jitter-ms", type=float, default=defaults.jitter_ms, help="Uniform +/- delay jitter")
+    parser.add_argument("--ms-per-char", type=float, default=defaults.ms_per_char,
+                        help="Extra delay per input character of speech requests")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Fraction of 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate,
+                        help="Fraction of 429 responses")
+    parser.add_argument("--chat-faults", action="store_true",
+                        help="Inject faults into chat completions (dialogue conversion) as well")
+    parser.add_argument("--rpm", type=int, default=defaults.rpm, help="Requests per minute advertised to clients")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Seed of the jitter and fault draws")
+    return parser
+
+def settings_from_arguments(args):
+    return MockSettings(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        ms_per_char=args.ms_per_char,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        chat_faults=args.chat_faults,
+        rpm=args.rpm,
+        seed=args.seed
+    )
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve mock ElevenLabs, OpenAI and Groq endpoints locally.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    return add_settings_arguments(parser)
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    server = MockApiServer(settings_from_arguments(args), args.host, args.port)
+    print(f"Mock API listening on {server.url} with {asdict(server.settings)}")
+    for name, value in server.client_environment().items():
+        print(f"  export {name}={value}")
+    with server:
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+import os
+import bisect
+import struct
+from collections import namedtuple
+
+# Bitrates in kbps indexed by [MPEG-1?][layer][bitrate index]
+_BITRATES = {
+    True: {
+        1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+        2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+        3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    },
+    False: {
+        1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+        2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+        3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    },
+}
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+_VERSIONS = {3: "1", 2: "2", 0: "2.5"}
+_LAYERS = {3: 1, 2: 2, 1: 3}
+_VERSION_BITS = {name: bits for bits, name in _VERSIONS.items()}
+_LAYER_BITS = {layer: bits for bits, layer in _LAYERS.items()}
+
+# Xing header flags: frame count, byte count and seek table present
+_XING_FLAGS = 0x01 | 0x02 | 0x04
+_XING_TOC_ENTRIES = 100
+
+# Stream properties that must match for frames of different clips to be joined
+Mp3Profile = namedtuple("Mp3Profile", ["version", "layer", "sample_rate", "channels"])
+
+# One parsed frame header
+Mp3Frame = namedtuple("Mp3Frame", ["profile", "bitrate", "length", "samples", "protected"])
+
+# Function to parse a single MP3 frame header
+def parse_frame_header(header):
+    """Return the Mp3Frame described by four header bytes, or None if they are not a valid frame header."""
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+    version_bits = (header[1] >> 3) & 0x03
+    layer_bits = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        # Reserved values, or free-format streams whose frame length cannot be computed from the header
+        return None
+
+    mpeg1 = version_bits == 3
+    layer = _LAYERS[layer_bits]
+    bitrate = _BITRATES[mpeg1][layer][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][rate_index]
+    padding = (header[2] >> 1) & 0x01
+    channels = 1 if (header[3] >> 6) == 3 else 2
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or mpeg1:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+
+    profile = Mp3Profile(_VERSIONS[version_bits], layer, sample_rate, channels)
+    return Mp3Frame(profile, bitrate, length, samples, (header[1] & 0x01) == 0)
+
+def _id3v2_size(data):
+    # ID3v2 tags start with "ID3" and store their size as four 7-bit bytes
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def _side_info_size(profile):
+    # Layer III side information length, which depends on MPEG version and channel count
+    mpeg1 = profile.version == "1"
+    if profile.channels == 1:
+        return 17 if mpeg1 else 9
+    return 32 if mpeg1 else 17
+
+def _is_info_frame(data, offset, frame):
+    # Xing/Info tags sit after the side information of the first frame; VBRI at a fixed offset
+    tag_offset = offset + 4 + (2 if frame.protected else 0) + _side_info_size(frame.profile)
+    tag = bytes(data[tag_offset:tag_offset + 4])
+    return tag in (b"Xing", b"Info") or bytes(data[offset + 36:offset + 40]) == b"VBRI"
+
+# Function to measure the tags in front of a clip's audio frames
+def leading_header_length(data):
+    """Return the length of the ID3v2 tag and Xing/Info/VBRI frame that start MP3 bytes, or None if more bytes are needed to tell."""
+    if len(data) < 10:
+        return None if b"ID3".startswith(bytes(data[:3])) or len(data) < 4 else 0
+    offset = _id3v2_size(data)
+    if offset + 4 > len(data):
+        return None
+    frame = parse_frame_header(data[offset:offset + 4])
+    if frame is None:
+        return offset
+    if offset + frame.length > len(data):
+        return None
+    return offset + frame.length if _is_info_frame(memoryview(data), offset, frame) else offset
+
+# Function to split MP3 data into audio frames
+def parse_mp3_frames(data):
+    """Return (profile, frames, sample_count) for MP3 bytes, or None if the stream cannot be joined frame by frame.
+
+    ID3 tags and Xing/Info/VBRI header frames are dropped; frames are returned as memoryview slices.
+    """
+    view = memoryview(data)
+    end = len(data)
+    if end >= 128 and bytes(view[end - 128:end - 125]) == b"TAG":
+        end -= 128
+
+    offset = _id3v2_size(data)
+    profile = None
+    frames = []
+    sample_count = 0
+    while offset + 4 <= end:
+        frame = parse_frame_header(view[offset:offset + 4])
+        if frame is None or offset + frame.length > end:
+            # Anything but trailing padding means the stream is not plain CBR/VBR MP3 frames
+            if bytes(view[offset:end]).strip(b"\x00"):
+                return None
+            break
+        if profile is None:
+            profile = frame.profile
+            if _is_info_frame(view, offset, frame):
+                offset += frame.length
+                continue
+        elif frame.profile != profile:
+            return None
+        frames.append(view[offset:offset + frame.length])
+        sample_count += frame.samples
+        offset += frame.length
+
+    if not frames:
+        return None
+    return profile, frames, sample_count
+
+# Function to join MP3 clips without decoding
+def concatenate_mp3_bytes(clips, pause_ms=0):
+    """Join MP3 clips frame by frame with pause_ms of silent frames between them.
+
+    Returns None if the clips do not share one profile, or if a pause is asked for between non-Layer III clips.
+    """
+    parsed = [parse_mp3_frames(clip) for clip in clips]
+    if not parsed or any(stream is None for stream in parsed):
+        return None
+    if len({stream[0] for stream in parsed}) != 1:
+        return None
+
+    pause = b""
+    if pause_ms:
+        profile = parsed[0][0]
+        if profile.layer != 3:
+            return None
+        frame, count, _ = silence_frames(profile, pause_ms)
+        pause = frame * count
+    return pause.join(b"".join(frames) for _, frames, _ in parsed)
+
+def _empty_frame(profile, min_length, bitrate=None):
+    # Smallest frame of the profile holding min_length bytes (and at least bitrate bits/s if given), with zeroed
+    # side information and main data. Zero side information means no Huffman data and no bit reservoir use,
+    # which decodes to silence.
+    version_bits = _VERSION_BITS[profile.version]
+    channel_mode = 3 if profile.channels == 1 else 0
+    rate_index = _SAMPLE_RATES[version_bits].index(profile.sample_rate)
+    for bitrate_index in range(1, 15):
+        header = bytes((
+            0xFF,
+            0xE0 | (version_bits << 3) | (_LAYER_BITS[profile.layer] << 1) | 0x01,
+            (bitrate_index << 4) | (rate_index << 2),
+            channel_mode << 6
+        ))
+        frame = parse_frame_header(header)
+        if frame.length >= min_length and frame.bitrate >= (bitrate or 0):
+            return bytearray(header) + bytearray(frame.length - 4), frame
+    raise ValueError(f"No {profile} frame can hold {min_length} bytes at {bitrate or 0} bits/s")
+
+# Function to build silent MP3 frames
+def silence_frames(profile, duration_ms, bitrate=None):
+    """Return (frame bytes, count, samples per frame) for Layer III frames covering duration_ms of silence.
+
+    Frames use the lowest bitrate that fits unless a minimum bitrate in bits per second is given.
+    """
+    frame, header = _empty_frame(profile, 4 + _side_info_size(profile), bitrate)
+    count = round(duration_ms / 1000 * profile.sample_rate / header.samples)
+    return bytes(frame), count, header.samples
+
+# Function to build a Xing header frame
+def xing_frame(profile, frame_count, byte_count, toc):
+    """Return a Xing header frame describing frame_count audio frames, byte_count stream bytes and a seek table."""
+    tag_offset = 4 + _side_info_size(profile)
+    payload = b"Xing" + struct.pack(">III", _XING_FLAGS, frame_count, byte_count) + bytes(toc)
+    frame, _ = _empty_frame(profile, tag_offset + len(payload))
+    frame[tag_offset:tag_offset + len(payload)] = payload
+    return bytes(frame)
+
+def _xing_toc(frame_ends, header_length):
+    # Entry i is the byte position, scaled to 0-255, at which i percent of the playing time starts
+    total_samples = frame_ends[-1][0]
+    total_bytes = header_length + frame_ends[-1][1]
+    sample_marks = [samples for samples, _ in frame_ends]
+    toc = []
+    for percent in range(_XING_TOC_ENTRIES):
+        index = bisect.bisect_left(sample_marks, total_samples * percent / _XING_TOC_ENTRIES)
+        offset = header_length + (frame_ends[index - 1][1] if index else 0)
+        toc.append(min(255, offset * 256 // total_bytes))
+    return toc
+
+# Function to join MP3 files with pauses without decoding
+def concatenate_mp3_files(clips, output_path, pause_ms):
+    """Join MP3 clips, given as bytes, frame by frame into output_path with silent frames between them and a new Xing header.
+
+    Returns output_path, or None (leaving no output file) if the clips are not Layer III streams of one profile.
+    Per-clip encoder delay and padding stay in the joined stream as a few milliseconds of extra silence.
+    """
+    profile = None
+    silence = None
+    frame_ends = []  # (samples, bytes) after each written frame, for the seek table
+    samples = 0
+    written = 0
+    try:
+        with open(output_path, "wb") as out:
+            for i, clip in enumerate(clips):
+                parsed = parse_mp3_frames(clip)
+                if parsed is None or parsed[0].layer != 3 or (profile is not None and parsed[0] != profile):
+                    raise ValueError(f"clip {i + 1}")
+
+                if profile is None:
+                    profile = parsed[0]
+                    silence = silence_frames(profile, pause_ms)
+                    # Reserve room for the Xing header, which is rewritten once the totals are known
+                    header_length = len(xing_frame(profile, 0, 0, bytes(_XING_TOC_ENTRIES)))
+                    out.write(bytes(header_length))
+                elif pause_ms:
+                    frame, count, frame_samples = silence
+                    for _ in range(count):
+                        out.write(frame)
+                        samples += frame_samples
+                        written += len(frame)
+                        frame_ends.append((samples, written))
+
+                frame_samples = parsed[2] // len(parsed[1])
+                for audio_frame in parsed[1]:
+                    out.write(audio_frame)
+                    samples += frame_samples
+                    written += len(audio_frame)
+                    frame_ends.append((samples, written))
+
+            if profile is None:
+                raise ValueError("no input files")
+            out.seek(0)
+            out.write(xing_frame(profile, len(frame_ends), header_length + written, _xing_toc(frame_ends, header_length)))
+    except (OSError, ValueError):
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return None
+    return output_path
@@ -0,0 +1,170 @@
+import os
+import time
+import secrets
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pipeline.audio_assembly import DEFAULT_PAUSE_MS
+from pipeline.mp3_frames import leading_header_length, parse_mp3_frames, silence_frames
+
+# Size of the pieces streamed TTS responses are read in
+STREAM_CHUNK_BYTES = 16 * 1024
+
+# Interface and port of the server the preview player streams from; port 0 picks a free one
+PLAYBACK_HOST = os.environ.get("VOICECANVAS_PLAYBACK_HOST", "127.0.0.1")
+PLAYBACK_PORT = int(os.environ.get("VOICECANVAS_PLAYBACK_PORT", "0"))
+# Base URL the browser reaches that server at, when it is behind a proxy or on another host
+PLAYBACK_PUBLIC_URL = os.environ.get("VOICECANVAS_PLAYBACK_PUBLIC_URL", "").rstrip("/")
+# How long and how many finished streams stay playable, and how long a listener waits for the next bytes
+PLAYBACK_STREAM_TTL_SECONDS = 30 * 60
+PLAYBACK_MAX_STREAMS = 16
+PLAYBACK_IDLE_TIMEOUT_SECONDS = 300
+
+
+class ProgressiveBuffer:
+    """Collects streamed MP3 bytes per script line and streams them out in script order as they arrive."""
+
+    def __init__(self, line_count, pause_ms=DEFAULT_PAUSE_MS):
+        self.line_count = line_count
+        self.pause_ms = pause_ms
+        self.closed = False
+        self._chunks = [[] for _ in range(line_count)]
+        self._done = [False] * line_count
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def append(self, index, chunk):
+        """Add streamed audio bytes for a line."""
+        if chunk:
+            with self._lock:
+                self._chunks[index].append(chunk)
+                self._changed.notify_all()
+
+    def finish(self, index, failed=False):
+        """Mark a line as complete; failed lines are skipped in playback."""
+        with self._lock:
+            if failed:
+                self._chunks[index] = []
+            self._done[index] = True
+            self._changed.notify_all()
+
+    def close(self):
+        """Stop waiting for lines that have not finished, e.g. when the render stopped early."""
+        with self._lock:
+            self.closed = True
+            self._changed.notify_all()
+
+    def stream(self, idle_timeout=PLAYBACK_IDLE_TIMEOUT_SECONDS):
+        """Yield the script's MP3 bytes in order as they arrive, including lines still streaming.
+
+        Each line's ID3 tag and Xing/Info frame are dropped and silent frames in the previous line's format
+        separate lines, so the output is one plain stream of MP3 frames. Ends when every line is finished,
+        the buffer is closed, or nothing arrives for idle_timeout seconds.
+        """
+        index = 0
+        sent = 0  # chunks of the current line already yielded
+        head = b""  # start of the current line, held back until its tags can be skipped
+        pause = None  # silent frames matching the last line that produced audio
+        while index < self.line_count:
+            with self._lock:
+                chunks = self._chunks[index][sent:]
+                done = self._done[index]
+                if not chunks and not done:
+                    if self.closed or not self._changed.wait(idle_timeout):
+                        return
+                    continue
+                line_audio = b"".join(self._chunks[index]) if done else None
+            sent += len(chunks)
+            piece = b"".join(chunks)
+
+            if head is not None:
+                # Nothing of this line was sent yet, so a finished line (empty if it failed) is taken whole
+                head = line_audio if done else head + piece
+                skip = leading_header_length(head)
+                if skip is None and not done:
+                    continue
+                piece = head[skip or 0:]
+                head = None
+                if piece and pause:
+                    yield pause
+            if piece:
+                yield piece
+
+            if done:
+                parsed = parse_mp3_frames(line_audio) if line_audio else None
+                if parsed and parsed[0].layer == 3 and self.pause_ms:
+                    frame, count, _ = silence_frames(parsed[0], self.pause_ms)
+                    pause = frame * count
+                index += 1
+                sent = 0
+                head = b""
+
+
+class _PlaybackHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        token = path[len("/playback/"):-len(".mp3")] if path.startswith("/playback/") and path.endswith(".mp3") else None
+        with _streams_lock:
+            entry = _streams.get(token)
+        if entry is None:
+            self.send_error(404)
+            return
+
+        # No length is sent; the response ends when the connection closes, like a radio stream
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        try:
+            for piece in entry[1].stream():
+                self.wfile.write(piece)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The player was closed or reloaded
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+_streams = OrderedDict()  # token -> (published at, buffer)
+_streams_lock = threading.Lock()
+_playback_server = None
+_playback_server_lock = threading.Lock()
+
+# Function to serve progressive playback streams
+def start_playback_server(host=PLAYBACK_HOST, port=PLAYBACK_PORT):
+    """Serve published buffers at /playback/<token>.mp3 in a background thread, once per process.
+
+    Returns the server, or None when it cannot listen on host and port.
+    """
+    global _playback_server
+    with _playback_server_lock:
+        if _playback_server is None:
+            try:
+                _playback_server = ThreadingHTTPServer((host, port), _PlaybackHandler)
+            except OSError:
+                return None
+            _playback_server.daemon_threads = True
+            threading.Thread(target=_playback_server.serve_forever, name="playback-server", daemon=True).start()
+    return _playback_server
+
+# Function to make a buffer playable by the browser
+def publish_stream(buffer):
+    """Return a URL that streams the buffer as one growing MP3, or None when the playback server is unavailable."""
+    server = start_playback_server()
+    if server is None:
+        return None
+
+    token = secrets.token_urlsafe(16)
+    now = time.time()
+    with _streams_lock:
+        _streams[token] = (now, buffer)
+        # The oldest streams are closed and forgotten
+        while len(_streams) > PLAYBACK_MAX_STREAMS or next(iter(_streams.values()))[0] < now - PLAYBACK_STREAM_TTL_SECONDS:
+            _, (_, expired) = _streams.popitem(last=False)
+            expired.close()
+
+    host, port = server.server_address[:2]
+    return f"{PLAYBACK_PUBLIC_URL or f'http://{host}:{port}'}/playback/{token}.mp3"
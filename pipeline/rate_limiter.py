@@ -0,0 +1,154 @@
+import os
+import re
+import time
+import random
+import hashlib
+import threading
+
+# Requests per minute each provider allows by default; response headers refine this at runtime
+PROVIDER_REQUESTS_PER_MINUTE = {
+    "openai": float(os.environ.get("OPENAI_TTS_RPM", "50")),
+    "elevenlabs": float(os.environ.get("ELEVENLABS_TTS_RPM", "100")),
+}
+DEFAULT_REQUESTS_PER_MINUTE = 30.0
+
+# Retry behaviour for rate-limited and failed requests
+RATE_LIMIT_MAX_ATTEMPTS = int(os.environ.get("VOICECANVAS_RATE_LIMIT_MAX_ATTEMPTS", "6"))
+RATE_LIMIT_BASE_DELAY = 1.0
+RATE_LIMIT_MAX_DELAY = 60.0
+RATE_LIMITED_STATUS = 429
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+def _parse_duration(value):
+    # Accepts plain seconds ("20") and OpenAI style durations ("1m30s", "250ms")
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+def _header(headers, name):
+    if not headers:
+        return None
+    return headers.get(name) or headers.get(name.title())
+
+
+class AdaptiveRateLimiter:
+    """Token bucket for one provider and API key that backs off on 429s and follows rate-limit headers."""
+
+    def __init__(self, requests_per_minute):
+        self.ceiling = requests_per_minute / 60.0
+        self.rate = self.ceiling
+        self.capacity = max(1.0, min(self.ceiling * 5, 10.0))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self, headers=None):
+        """Creep back towards the allowed ceiling and apply any rate-limit headers."""
+        with self._lock:
+            self._apply_headers(headers)
+            self.rate = min(self.ceiling, self.rate + self.ceiling * 0.1)
+
+    def on_failure(self, attempt, headers=None, rate_limited=False):
+        """Pause every request on this bucket for a jittered backoff, halving the rate on a 429."""
+        retry_after = _parse_duration(_header(headers, "retry-after"))
+        if retry_after is None:
+            retry_after = random.uniform(0, min(RATE_LIMIT_MAX_DELAY, RATE_LIMIT_BASE_DELAY * 2 ** attempt))
+        with self._lock:
+            self._apply_headers(headers)
+            if rate_limited:
+                self.rate = max(self.ceiling * 0.05, self.rate / 2)
+                self.tokens = 0
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    def _apply_headers(self, headers):
+        # OpenAI reports per-minute request limits and when the window resets
+        limit = _header(headers, "x-ratelimit-limit-requests")
+        if limit:
+            try:
+                self.ceiling = float(limit) / 60.0
+                self.rate = min(self.rate, self.ceiling)
+                self.capacity = max(1.0, min(self.ceiling * 5, 10.0))
+            except ValueError:
+                pass
+        remaining = _header(headers, "x-ratelimit-remaining-requests")
+        reset = _parse_duration(_header(headers, "x-ratelimit-reset-requests"))
+        if remaining is not None and reset and str(remaining).strip() == "0":
+            self.blocked_until = max(self.blocked_until, time.monotonic() + reset)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+# Function to get the shared rate limiter for a provider and API key
+def get_rate_limiter(provider, api_key):
+    """Return the process-wide rate limiter for a provider and API key."""
+    limiter_key = (provider, hashlib.sha256((api_key or "").encode("utf-8")).hexdigest())
+    with _limiters_lock:
+        limiter = _limiters.get(limiter_key)
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(PROVIDER_REQUESTS_PER_MINUTE.get(provider, DEFAULT_REQUESTS_PER_MINUTE))
+            _limiters[limiter_key] = limiter
+        return limiter
+
+# Function to send a request under a rate limiter, retrying rate limits and server errors
+def call_rate_limited(limiter, send, max_attempts=RATE_LIMIT_MAX_ATTEMPTS):
+    """Call send() when the limiter allows it and retry 429/5xx outcomes with jittered exponential backoff.
+
+    send() returns a response with status_code and headers, or raises an exception carrying them
+    (as the OpenAI SDK does). The last response or exception is passed through when retries run out.
+    """
+    for attempt in range(max_attempts):
+        last_attempt = attempt == max_attempts - 1
+        limiter.acquire()
+        try:
+            response = send()
+        except Exception as e:
+            status = getattr(e, "status_code", None)
+            if status not in RETRYABLE_STATUS_CODES or last_attempt:
+                raise
+            headers = getattr(getattr(e, "response", None), "headers", None)
+            limiter.on_failure(attempt, headers, rate_limited=status == RATE_LIMITED_STATUS)
+            continue
+
+        status = getattr(response, "status_code", 200)
+        headers = getattr(response, "headers", None)
+        if status in RETRYABLE_STATUS_CODES:
+            if last_attempt:
+                return response
+            limiter.on_failure(attempt, headers, rate_limited=status == RATE_LIMITED_STATUS)
+            response.close()
+            continue
+
+        limiter.on_success(headers)
+        return response
@@ -0,0 +1,75 @@
+import json
+import hashlib
+
+# Voice settings that change the audio each provider produces
+PROVIDER_SETTING_KEYS = {
+    "openai": ("speed",),
+    "elevenlabs": ("stability", "similarity_boost"),
+}
+
+# Function to compute the signature of one rendered line
+def line_signature(job, voice_settings):
+    """Return a hash of everything that determines a line's audio: text, emotion, voice and provider settings."""
+    provider = job.get("provider")
+    payload = json.dumps({
+        "character": job.get("character"),
+        "dialogue": job.get("dialogue"),
+        "emotion": job.get("emotion"),
+        "provider": provider,
+        "voice_id": job.get("voice_id"),
+        "settings": {key: voice_settings.get(key) for key in PROVIDER_SETTING_KEYS.get(provider, ())}
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderGraph:
+    """Rendered clips of a script keyed by line signature, so edits only regenerate the lines that changed."""
+
+    def __init__(self):
+        self.nodes = {}  # signature -> {"clip": ClipStore clip}
+        self._by_clip = {}  # clip -> signature
+
+    def has(self, signature):
+        node = self.nodes.get(signature)
+        return bool(node) and node["clip"].exists()
+
+    def tracks(self, clip):
+        """Return True if a clip belongs to the graph."""
+        return clip in self._by_clip
+
+    def clip(self, signature):
+        return self.nodes[signature]["clip"]
+
+    def add(self, signature, clip):
+        """Record the clip rendered for a signature, replacing any older one."""
+        self._drop(signature)
+        self.nodes[signature] = {"clip": clip}
+        self._by_clip[clip] = signature
+
+    def dirty_jobs(self, jobs, signatures):
+        """Return the jobs whose signature has no usable clip yet, one job per distinct signature."""
+        dirty = []
+        seen = set()
+        for job, signature in zip(jobs, signatures):
+            if signature in seen or self.has(signature):
+                continue
+            seen.add(signature)
+            dirty.append(job)
+        return dirty
+
+    def prune(self, keep_signatures):
+        """Delete clips of lines that are no longer in the script."""
+        keep = set(keep_signatures)
+        for signature in [signature for signature in self.nodes if signature not in keep]:
+            self._drop(signature)
+
+    def _drop(self, signature):
+        node = self.nodes.pop(signature, None)
+        if node:
+            self._by_clip.pop(node["clip"], None)
+            node["clip"].discard()
+
+    def clear(self):
+        """Delete every clip held by the graph."""
+        for signature in list(self.nodes):
+            self._drop(signature)
@@ -0,0 +1,175 @@
+# Renders and dubbing driven by plain data, so they can run in job queue workers as well as in the CLI
+from pipeline import services
+from pipeline.clip_store import get_clip_store
+from pipeline.line_batching import plan_batches, split_batch_audio, display_text
+from pipeline.render_graph import line_signature
+from pipeline.tts_engine import generate_lines_concurrently
+from pipeline.tracing import trace
+
+# Function to build one generation job per dialogue line
+def plan_line_jobs(parsed_data, character_voices):
+    """Return the generation jobs for parsed dialogue and the characters that have no voice assigned."""
+    jobs = []
+    unassigned = []
+    for i, item in enumerate(parsed_data):
+        voice_config = character_voices.get(item["character"]) or character_voices.get("*")
+        if not voice_config:
+            unassigned.append(item["character"])
+            continue
+        jobs.append({
+            "index": i,
+            "character": item["character"],
+            "dialogue": item["dialogue"],
+            "emotion": item["emotion"],
+            "provider": voice_config["provider"],
+            "voice_id": voice_config["voice_id"]
+        })
+    return jobs, sorted(set(unassigned))
+
+def _synthesize(context, job, text, on_chunk=None):
+    # Audio stays in memory as a ClipStore clip instead of going through a temp file
+    voice_settings = context.voice_settings
+    if job["provider"] == "openai":
+        result = services.synthesize_openai_bytes(context, text, job["voice_id"], voice_settings.get("speed", 1.0), on_chunk=on_chunk)
+    elif job["provider"] == "elevenlabs":
+        result = services.synthesize_elevenlabs_bytes(context, text, job["voice_id"], {
+            "stability": voice_settings.get("stability", 0.5),
+            "similarity_boost": voice_settings.get("similarity_boost", 0.75)
+        }, on_chunk=on_chunk)
+    else:
+        return services.ServiceResult(None, f"Unknown provider: {job['provider']}")
+    if result.error:
+        return result
+    return result._replace(value=get_clip_store().put(result.value))
+
+# Function to voice every line of parsed dialogue
+def generate_clips(jobs, context, on_progress=None):
+    """Synthesize each job's line and return (ClipStore clips in job order with None for failures, error messages)."""
+    errors = []
+
+    def synthesize_line(job):
+        result = _synthesize(context, job, job["dialogue"])
+        if result.error:
+            errors.append(f"Line {job['index'] + 1}: {result.error}")
+        return result.value
+
+    return generate_lines_concurrently(jobs, synthesize_line, on_progress=on_progress), errors
+
+# Function to voice the lines of a script that have no clip yet
+def render_lines(jobs, context, rendered_signatures=(), batch_lines=False, on_chunk=None, on_line_done=None, on_progress=None):
+    """Voice each job whose line signature is not in rendered_signatures, once per distinct signature.
+
+    Shared by the page and the job queue workers. With batch_lines, consecutive lines of one voice go out as one
+    request and are split again. on_chunk(job, chunk) receives the audio of each request as it streams, under the
+    request's first line; on_line_done(job, clip) is called as each line's clip is ready (None if it failed).
+    Returns a dict with the job "signatures", the new ClipStore "clips" by signature, the "dirty_lines" count,
+    "errors", "cache_hits" and the "timings" breakdown.
+    """
+    signatures = [line_signature(job, context.voice_settings) for job in jobs]
+    signature_of = {job["index"]: signature for job, signature in zip(jobs, signatures)}
+    seen = set(rendered_signatures)
+    dirty_jobs = []
+    for job, signature in zip(jobs, signatures):
+        if signature not in seen:
+            seen.add(signature)
+            dirty_jobs.append(job)
+    errors = []
+
+    def voice(job, text, stream=None):
+        result = _synthesize(context, job, text, stream)
+        if result.error:
+            errors.append(f"Line {job['index'] + 1}: {result.error}")
+        return result.value
+
+    def synthesize_batch(batch):
+        lines = batch["lines"]
+        stream = (lambda chunk: on_chunk(lines[0], chunk)) if on_chunk else None
+        batch_clip = voice(batch, batch["dialogue"], stream)
+        clips = [batch_clip] if batch_clip else [None] * len(lines)
+        if batch_clip and len(lines) > 1:
+            # Cut the merged audio back into lines at the inserted pauses
+            try:
+                pieces = split_batch_audio(batch_clip.read(), [line["dialogue"] for line in lines])
+            except Exception:
+                pieces = None
+            batch_clip.discard()
+
+            # Fall back to one request per line when the pauses cannot be found or the cuts look wrong
+            if pieces:
+                clips = [get_clip_store().put(piece) for piece in pieces]
+            else:
+                clips = [voice(line, line["dialogue"]) for line in lines]
+
+        if on_line_done:
+            for line, clip in zip(lines, clips):
+                on_line_done(line, clip)
+        return clips
+
+    batches = plan_batches(dirty_jobs) if batch_lines else plan_batches(dirty_jobs, max_lines=1)
+    with trace("generate") as generate_trace:
+        results = generate_lines_concurrently(batches, synthesize_batch, on_progress=on_progress)
+
+    clips = {}
+    for batch, batch_clips in zip(batches, results):
+        for line, clip in zip(batch["lines"], batch_clips or []):
+            if clip:
+                clips[signature_of[line["index"]]] = clip
+    timings = generate_trace.breakdown()
+    return {
+        "signatures": signatures,
+        "clips": clips,
+        "dirty_lines": len(dirty_jobs),
+        "errors": errors,
+        # Counted from this render's own TTS spans, so other renders' cache hits are left out
+        "cache_hits": sum(row["cache_hits"] for row in timings if row["stage"].startswith("tts.")),
+        "timings": timings
+    }
+
+# Function to run a queued render job
+def run_render_job(payload, report_progress):
+    """Voice the payload's parsed dialogue through render_lines and return its outcome.
+
+    payload holds "context" (build_context arguments), "parsed_data", "character_voices", "batch_lines" and the
+    "rendered_signatures" the page already has clips for. The result adds the script "line_indexes" of the
+    signatures and the "unassigned_characters", so the page can register the clips in its render graph.
+    The clips are handed over as temp file paths, which the page adopts into its own clip store.
+    """
+    context = services.build_context(**payload["context"])
+    jobs, unassigned = plan_line_jobs(payload["parsed_data"], payload["character_voices"])
+
+    def on_progress(completed, total, job):
+        report_progress(completed / total, f"Generated {completed}/{total} requests - {job['character']}: {display_text(job)[:50]}...")
+
+    outcome = render_lines(
+        jobs,
+        context,
+        payload.get("rendered_signatures", ()),
+        batch_lines=payload.get("batch_lines", False),
+        on_progress=on_progress
+    )
+    clips = {signature: clip.detach() for signature, clip in outcome["clips"].items()}
+    return dict(outcome, clips=clips, line_indexes=[job["index"] for job in jobs], unassigned_characters=unassigned)
+
+# Function to run a queued dubbing job
+def run_dub_job(payload, report_progress):
+    """Dub the payload's audio file and return the dubbed MP3 path.
+
+    payload holds "context", "provider", "audio_path", "target_language" and "voice".
+    """
+    context = services.build_context(**payload["context"])
+
+    def on_chunk_ready(index, total, chunk_path):
+        report_progress((index + 1) / total, f"Dubbed chunk {index + 1} of {total}")
+
+    with trace("dub") as dub_trace:
+        result = services.dub_audio(
+            context,
+            payload["provider"],
+            payload["audio_path"],
+            payload["target_language"],
+            payload["voice"],
+            on_chunk_ready=on_chunk_ready
+        )
+    if result.error:
+        raise RuntimeError(result.error)
+    return {"output": result.value, "timings": dub_trace.breakdown()}
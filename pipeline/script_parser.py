@@ -0,0 +1,34 @@
+import re
+
+# Function to parse text from string
+def parse_text_from_string(text):
+    """Parse text into structured dialogue data."""
+    lines = text.strip().split('\n')
+    parsed_data = []
+
+    for line in lines:
+        if not line.strip():
+            continue
+
+        # Check if line follows the format "Character (emotion): Dialogue"
+        match = re.match(r"(.*?)(?:\s*\((.*?)\))?\s*:\s*(.*)", line)
+
+        if match:
+            character = match.group(1).strip()
+            emotion = match.group(2).strip() if match.group(2) else None
+            dialogue = match.group(3).strip()
+
+            parsed_data.append({
+                "character": character,
+                "emotion": emotion,
+                "dialogue": dialogue
+            })
+        else:
+            # If line doesn't match the format, treat it as narration
+            parsed_data.append({
+                "character": "Narrator",
+                "emotion": None,
+                "dialogue": line.strip()
+            })
+
+    return parsed_data
@@ -0,0 +1,519 @@
+import os
+import wave
+import tempfile
+from io import BytesIO
+from contextlib import ExitStack
+from collections import namedtuple
+from dataclasses import dataclass, field, replace, asdict
+
+from pydub import AudioSegment
+
+from pipeline.client_registry import get_openai_client, get_groq_client
+from pipeline.llm_cache import llm_cache_key, get_cached_response, store_response
+from pipeline.clip_cache import clip_cache_key, get_cached_clip_bytes, store_clip
+from pipeline.elevenlabs_client import ELEVENLABS_API_BASE, get_elevenlabs_client
+from pipeline.audio_assembly import assemble_segments_to_wav, encode_wav_to_mp3, remove_intermediate
+from pipeline.asset_cache import fetch_cached_asset, is_cached_asset
+from pipeline.background_bed import load_background_bed
+from pipeline.mmap_mix import mix_beds_into_wav
+from pipeline.voice_catalog import get_voice_catalog
+from pipeline.progressive_playback import STREAM_CHUNK_BYTES
+from pipeline.rate_limiter import get_rate_limiter, call_rate_limited
+from pipeline.ffmpeg_mix import EXPORT_BACKEND, render_mix_with_ffmpeg
+from pipeline.mp3_frames import concatenate_mp3_files
+from pipeline.dubbing_pipeline import dub_in_chunks
+from pipeline.tracing import span
+
+# Browser-like headers so background track hosts do not block downloads
+BACKGROUND_DOWNLOAD_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "*/*",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Connection": "keep-alive"
+}
+
+
+@dataclass(frozen=True)
+class ServiceContext:
+    """Immutable snapshot of the keys and settings a render needs, safe to hand to threads and processes."""
+    openai_key: str = ""
+    elevenlabs_key: str = ""
+    groq_key: str = ""
+    voice_settings: dict = field(default_factory=dict)
+    background_tracks: tuple = ()
+    bg_volume: float = 0.3
+    volume_automation: tuple = ()
+    export_backend: str = ""
+
+    def with_overrides(self, **changes):
+        """Return a copy of the context with some fields replaced."""
+        return replace(self, **changes)
+
+    def as_payload(self):
+        """Return the context as build_context arguments that can be sent to another process as JSON."""
+        return asdict(self)
+
+
+# Outcome of a service call: the value on success, otherwise an error message
+ServiceResult = namedtuple("ServiceResult", ["value", "error", "warnings"], defaults=(None, ()))
+
+def _ok(value, warnings=()):
+    return ServiceResult(value, None, tuple(warnings))
+
+def _fail(error, warnings=()):
+    return ServiceResult(None, error, tuple(warnings))
+
+# Function to build a context from plain values
+def build_context(openai_key=None, elevenlabs_key=None, groq_key=None, voice_settings=None,
+                  background_tracks=None, bg_volume=0.3, volume_automation=None, export_backend=None):
+    """Create a ServiceContext, falling back to environment variables for missing keys."""
+    return ServiceContext(
+        openai_key=openai_key or os.environ.get("OPENAI_API_KEY", ""),
+        elevenlabs_key=elevenlabs_key or os.environ.get("ELEVENLABS_API_KEY", ""),
+        groq_key=groq_key or os.environ.get("GROQ_API_KEY", ""),
+        voice_settings=dict(voice_settings or {}),
+        background_tracks=tuple(dict(track) for track in (background_tracks or [])),
+        bg_volume=bg_volume,
+        volume_automation=tuple(dict(point) for point in (volume_automation or [])),
+        export_backend=export_backend or EXPORT_BACKEND
+    )
+
+# Function to get an OpenAI client for a context
+def openai_client(context):
+    """Return the shared OpenAI client for the context's key, or None if no key is set."""
+    return get_openai_client(context.openai_key)
+
+# Function to get a Groq client for a context
+def groq_client(context):
+    """Return the shared Groq client for the context's key, or None if no key is set."""
+    return get_groq_client(context.groq_key)
+
+# Function to synthesize one line with OpenAI TTS and return the audio bytes
+def synthesize_openai_bytes(context, text, voice_model, speed=1.0, on_chunk=None):
+    """Generate speech for text with OpenAI TTS and return the MP3 bytes.
+
+    When on_chunk is given it receives the audio bytes as they stream in.
+    """
+    with span("tts.openai", provider="openai", chars=len(text)) as record:
+        result = _synthesize_openai_bytes(context, text, voice_model, speed, on_chunk, record)
+        record["error"] = result.error
+        return result
+
+def _synthesize_openai_bytes(context, text, voice_model, speed, on_chunk, record):
+    try:
+        client = openai_client(context)
+        if not client:
+            return _fail("OpenAI API key not set. Please provide a valid API key.")
+
+        # Reuse a previously generated clip for identical input
+        cache_key = clip_cache_key("openai", voice_model, "tts-1-hd", {"speed": speed}, text)
+        cached_audio = get_cached_clip_bytes(cache_key)
+        if cached_audio:
+            record["cache_hit"] = True
+            record["bytes"] = len(cached_audio)
+            if on_chunk:
+                on_chunk(cached_audio)
+            return _ok(cached_audio)
+
+        # The audio is collected in memory as the response streams in
+        chunks = []
+        with ExitStack() as stack:
+            # Requests are paced per API key and rate-limited ones are retried here, so the
+            # SDK's own retries are turned off instead of multiplying the attempts
+            response = call_rate_limited(
+                get_rate_limiter("openai", context.openai_key),
+                lambda: stack.enter_context(client.with_options(max_retries=0).audio.speech.with_streaming_response.create(
+                    model="tts-1-hd",
+                    voice=voice_model,
+                    input=text,
+                    speed=speed
+                ))
+            )
+            for chunk in response.iter_bytes(STREAM_CHUNK_BYTES):
+                chunks.append(chunk)
+                if on_chunk:
+                    on_chunk(chunk)
+        audio = b"".join(chunks)
+        store_clip(cache_key, audio)
+        record["bytes"] = len(audio)
+        return _ok(audio)
+
+    except Exception as e:
+        return _fail(f"Error generating voice with OpenAI: {str(e)}")
+
+# Function to synthesize one line with OpenAI TTS into a file
+def synthesize_openai(context, text, voice_model, speed=1.0, on_chunk=None):
+    """Generate an MP3 file for text with OpenAI TTS and return its path."""
+    result = synthesize_openai_bytes(context, text, voice_model, speed, on_chunk=on_chunk)
+    if result.error:
+        return result
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
+        temp_file.write(result.value)
+        return _ok(temp_file.name)
+
+# Function to synthesize one line with ElevenLabs and return the audio bytes
+def synthesize_elevenlabs_bytes(context, text, voice_id, voice_settings, model_id=None, stream=True, on_chunk=None):
+    """Generate speech for text with ElevenLabs and return the MP3 bytes.
+
+    When on_chunk is given it receives the audio bytes as they stream in.
+    """
+    with span("tts.elevenlabs", provider="elevenlabs", chars=len(text)) as record:
+        result = _synthesize_elevenlabs_bytes(context, text, voice_id, voice_settings, model_id, stream, on_chunk, record)
+        record["error"] = result.error
+        return result
+
+def _synthesize_elevenlabs_bytes(context, text, voice_id, voice_settings, model_id, stream, on_chunk, record):
+    try:
+        if not context.elevenlabs_key:
+            return _fail("ElevenLabs API key not set. Please provide a valid API key.")
+
+        headers = {
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json",
+            "xi-api-key": context.elevenlabs_key
+        }
+        data = {
+            "text": text,
+            "voice_settings": voice_settings
+        }
+        if model_id:
+            data["model_id"] = model_id
+
+        # Reuse a previously generated clip for identical input
+        cache_key = clip_cache_key("elevenlabs", voice_id, model_id or "default", voice_settings, text)
+        cached_audio = get_cached_clip_bytes(cache_key)
+        if cached_audio:
+            record["cache_hit"] = True
+            record["bytes"] = len(cached_audio)
+            if on_chunk:
+                on_chunk(cached_audio)
+            return _ok(cached_audio)
+
+        endpoint = f"{ELEVENLABS_API_BASE}/text-to-speech/{voice_id}"
+        if stream:
+            endpoint += "/stream"
+        # Requests are paced per API key and rate-limited ones are retried here; the shared
+        # session does not retry POST status codes itself
+        response = call_rate_limited(
+            get_rate_limiter("elevenlabs", context.elevenlabs_key),
+            lambda: get_elevenlabs_client().post(endpoint, json=data, headers=headers, stream=on_chunk is not None)
+        )
+
+        if response.status_code != 200:
+            return _fail(f"Failed to generate audio with ElevenLabs. Status code: {response.status_code}. Response: {response.text}")
+
+        if on_chunk:
+            # Hand each piece on as soon as it arrives instead of waiting for the whole body
+            chunks = []
+            for chunk in response.iter_content(STREAM_CHUNK_BYTES):
+                chunks.append(chunk)
+                on_chunk(chunk)
+            audio = b"".join(chunks)
+        else:
+            audio = response.content
+
+        store_clip(cache_key, audio)
+        record["bytes"] = len(audio)
+        return _ok(audio)
+
+    except Exception as e:
+        return _fail(f"Error generating voice with ElevenLabs: {str(e)}")
+
+# Function to synthesize one line with ElevenLabs into a file
+def synthesize_elevenlabs(context, text, voice_id, stability=0.5, similarity_boost=0.75, on_chunk=None):
+    """Generate an MP3 file for text with ElevenLabs and return its path."""
+    result = synthesize_elevenlabs_bytes(context, text, voice_id, {
+        "stability": stability,
+        "similarity_boost": similarity_boost
+    }, on_chunk=on_chunk)
+    if result.error:
+        return result
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
+        temp_file.write(result.value)
+        return _ok(temp_file.name)
+
+# Function to transcribe an audio file with Whisper
+def transcribe_audio(context, audio_path):
+    """Return the transcript of an audio file as text."""
+    with open(audio_path, "rb") as audio_file:
+        return openai_client(context).audio.transcriptions.create(
+            model="whisper-1",
+            file=audio_file,
+            response_format="text"
+        )
+
+# Function to convert paragraph to dialogue format using Groq
+def convert_paragraph_to_dialogue(context, text):
+    """Rewrite paragraph text as "Character (emotion): Dialogue" lines with Groq and return the dialogue text."""
+    with span("llm.dialogue", provider="groq", chars=len(text)) as record:
+        result = _convert_paragraph_to_dialogue(context, text, record)
+        record["error"] = result.error
+        return result
+
+def _convert_paragraph_to_dialogue(context, text, record):
+    try:
+        # Identical requests are answered from the shared response cache
+        cache_key = llm_cache_key("llama3-70b-8192", "dialogue_lines", None, text)
+        cached_dialogue = get_cached_response(cache_key)
+        if cached_dialogue is not None:
+            record["cache_hit"] = True
+            return _ok(cached_dialogue)
+
+        client = groq_client(context)
+        if not client:
+            return _fail("Groq API key not set. Please provide a valid API key.")
+
+        # Create prompt for dialogue conversion
+        prompt = f"""
+        Convert the following paragraph into a dialogue format with character names, 
+        emotions in parentheses, and spoken lines. Format each line as "Character (emotion): Dialogue".
+        Ensure the dialogue is natural and flows well between characters.
+        
+        Paragraph: {text}
+        
+        Please return only the dialogue without any additional explanation.
+        """
+
+        completion = client.chat.completions.create(
+            model="llama3-70b-8192",
+            messages=[
+                {"role": "system", "content": "You are a skilled dialogue writer that converts paragraphs into natural dialogue format."},
+                {"role": "user", "content": prompt}
+            ]
+        )
+
+        dialogue_text = completion.choices[0].message.content.strip()
+        store_response(cache_key, dialogue_text)
+        return _ok(dialogue_text)
+    except Exception as e:
+        return _fail(f"Error converting text to dialogue format: {str(e)}")
+
+# Function to translate text for dubbing
+def translate_text(context, text, target_language):
+    """Translate text to the target language using GPT-4o."""
+    if not text or not text.strip():
+        return ""
+
+    translation_prompt = f"Translate the following text to {target_language}. Maintain the tone and meaning:\n\n{text}"
+
+    translation_response = openai_client(context).chat.completions.create(
+        model="gpt-4o",  # Using GPT-4o for high-quality translation
+        messages=[
+            {"role": "system", "content": f"You are a professional translator for {target_language}."},
+            {"role": "user", "content": translation_prompt}
+        ]
+    )
+
+    return translation_response.choices[0].message.content.strip()
+
+# Function to dub an audio file into another language
+def dub_audio(context, provider, audio_file_path, target_language, voice, on_chunk_ready=None):
+    """Transcribe, translate and re-voice an audio file chunk by chunk and return the dubbed MP3 path.
+
+    provider is "openai" (voice is an OpenAI voice name) or "elevenlabs" (voice is a voice ID).
+    """
+    label = "OpenAI" if provider == "openai" else "ElevenLabs"
+    if not openai_client(context):
+        if provider == "openai":
+            return _fail("OpenAI API key not set. Please provide a valid API key.")
+        return _fail("OpenAI and ElevenLabs API keys are required for this operation.")
+    if provider == "elevenlabs" and not context.elevenlabs_key:
+        return _fail("OpenAI and ElevenLabs API keys are required for this operation.")
+
+    def transcribe(chunk_path):
+        with span("dub.transcribe", provider="openai", bytes=os.path.getsize(chunk_path)):
+            return transcribe_audio(context, chunk_path)
+
+    def translate(transcribed_text):
+        with span("dub.translate", provider="openai", chars=len(transcribed_text or "")):
+            return translate_text(context, transcribed_text, target_language)
+
+    # Convert the translated text to speech in the target language
+    def synthesize(translated_text):
+        if not translated_text:
+            return None
+        if provider == "openai":
+            result = synthesize_openai(context, translated_text, voice)
+        else:
+            result = synthesize_elevenlabs(context, translated_text, voice)
+        if result.error:
+            raise RuntimeError(result.error)
+        return result.value
+
+    with span("dub", provider=provider) as record:
+        try:
+            # Chunks flow through transcription, translation and synthesis concurrently
+            output_path = dub_in_chunks(audio_file_path, transcribe, translate, synthesize, on_chunk_ready)
+            record["bytes"] = os.path.getsize(output_path) if output_path else 0
+            return _ok(output_path)
+        except Exception as e:
+            record["error"] = str(e)
+            return _fail(f"Error during {label} dubbing: {str(e)}")
+
+# Function to list ElevenLabs voices
+def list_elevenlabs_voices(context, force_refresh=False):
+    """Return a copy of the shared voice catalog's name -> voice ID dictionary."""
+    try:
+        if not context.elevenlabs_key:
+            return _fail("ElevenLabs API key not set. Please provide a valid API key.")
+
+        catalog = get_voice_catalog(context.elevenlabs_key, force_refresh)
+        if catalog.error and (force_refresh or not catalog.is_loaded()):
+            return _fail(f"Failed to fetch ElevenLabs voices. {catalog.error}")
+        return _ok(dict(catalog.name_to_id))
+
+    except Exception as e:
+        return _fail(f"Error fetching ElevenLabs voices: {str(e)}")
+
+# Function to create a placeholder background track
+def create_demo_audio(track_name):
+    """Create a short soft tone standing in for a background track that could not be downloaded."""
+    from pydub.generators import Sine
+
+    # Generate different tones based on track type for demo
+    if "bird" in track_name.lower():
+        demo_audio = Sine(440).to_audio_segment(duration=3000).fade_in(300).fade_out(500)
+        demo_audio = demo_audio - 25
+    elif "ocean" in track_name.lower() or "wave" in track_name.lower():
+        demo_audio = Sine(180).to_audio_segment(duration=3000).fade_in(500).fade_out(500)
+        demo_audio = demo_audio - 20
+    elif "piano" in track_name.lower():
+        demo_audio = Sine(262).to_audio_segment(duration=500)
+        demo_audio += Sine(330).to_audio_segment(duration=500)
+        demo_audio += Sine(392).to_audio_segment(duration=500)
+        demo_audio = demo_audio.fade_in(100).fade_out(300)
+        demo_audio = demo_audio - 15
+    else:
+        demo_audio = Sine(220).to_audio_segment(duration=3000).fade_in(300).fade_out(500)
+        demo_audio = demo_audio - 20
+
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
+    demo_audio.export(temp_file.name, format="mp3")
+    return temp_file.name
+
+# Function to resolve a background track URL to a local file
+def resolve_background_track(track_url, track_name):
+    """Return a local path for a background track, falling back to demo audio with a warning."""
+    try:
+        # Some pixabay links have access restrictions, so a demo tone is used instead
+        if "pixabay.com" in track_url and not track_url.endswith(".mp3"):
+            return _ok(create_demo_audio(track_name), ["Using local demo track instead of remote URL due to access restrictions"])
+
+        # Served from the local cache when fresh, revalidated with ETag/Last-Modified otherwise
+        cached_path = fetch_cached_asset(track_url, headers=BACKGROUND_DOWNLOAD_HEADERS)
+        if cached_path:
+            return _ok(cached_path)
+        return _ok(create_demo_audio(track_name), ["Could not download track directly. Using demo audio instead."])
+    except Exception as e:
+        try:
+            return _ok(create_demo_audio(track_name), [f"Using demo audio instead. Error: {str(e)}"])
+        except Exception as demo_error:
+            return _fail(f"Error creating demo audio: {str(demo_error)}")
+
+def _resolve_backgrounds(context, background_track, warnings):
+    # Returns the local background files with their volumes, and the downloads to delete afterwards
+    backgrounds = []
+    downloaded = []
+    for track in context.background_tracks:
+        # Download the track if it's a URL, otherwise use the local file
+        if 'url' in track:
+            resolved = resolve_background_track(track['url'], track['name'])
+            warnings.extend(resolved.warnings)
+            bg_track_path = resolved.value
+            if not bg_track_path:
+                continue
+            # Cached tracks are kept for later exports
+            if not is_cached_asset(bg_track_path):
+                downloaded.append(bg_track_path)
+        else:
+            bg_track_path = track.get('path')
+            if not bg_track_path or not os.path.exists(bg_track_path):
+                continue
+        backgrounds.append({"path": bg_track_path, "volume": track.get('volume', context.bg_volume)})
+
+    # For backward compatibility, support a direct background track path
+    if not context.background_tracks and background_track and background_track != "None":
+        backgrounds.append({"path": background_track, "volume": context.bg_volume})
+    return backgrounds, downloaded
+
+def _concatenate_with_ffmpeg(context, clips, output_path, backgrounds):
+    # ffmpeg reads files, so clips still in memory are spilled first
+    return render_mix_with_ffmpeg(
+        [clip.path() for clip in clips],
+        output_path,
+        backgrounds,
+        pause_ms=1000,
+        automation_points=context.volume_automation if context.background_tracks else None
+    )
+
+# Function to concatenate narration clips and mix in background audio
+def concatenate_clips(context, clips, output_path, background_track=None):
+    """Join ClipStore clips with 1-second pauses, mix the context's background tracks and export an MP3.
+
+    Without backgrounds, compatible MP3 clips are copied frame by frame from memory instead of decoded.
+    """
+    with span("export", clips=len(clips)) as record:
+        result = _concatenate_clips(context, clips, output_path, background_track)
+        record["error"] = result.error
+        record["bytes"] = os.path.getsize(result.value) if result.value else 0
+        return result
+
+def _concatenate_clips(context, clips, output_path, background_track):
+    warnings = []
+    downloaded = []
+    narration_wav = None
+    mixed_wav = None
+    try:
+        if not clips:
+            return _fail("No audio files to combine.")
+
+        backgrounds, downloaded = _resolve_backgrounds(context, background_track, warnings)
+
+        # Plain narration from MP3 clips of one format is joined frame by frame, without decoding
+        if not backgrounds:
+            with span("export.frame_join") as record:
+                joined = concatenate_mp3_files((clip.read() for clip in clips), output_path, pause_ms=1000)
+                record["fallback"] = not joined
+            if joined:
+                return _ok(output_path, warnings)
+
+        # The ffmpeg backend decodes, joins, mixes and encodes in a single subprocess
+        if (context.export_backend or EXPORT_BACKEND) == "ffmpeg":
+            with span("export.ffmpeg", backgrounds=len(backgrounds)):
+                return _ok(_concatenate_with_ffmpeg(context, clips, output_path, backgrounds), warnings)
+
+        # Decode every clip from memory, separated by a 1-second pause, into one WAV file
+        with span("export.decode", clips=len(clips)):
+            narration_wav = assemble_segments_to_wav(
+                (AudioSegment.from_file(BytesIO(clip.read())) for clip in clips), pause_ms=1000
+            )
+
+        # Without background audio the narration is encoded to MP3 straight from disk
+        if not backgrounds:
+            with span("export.encode"):
+                return _ok(encode_wav_to_mp3(narration_wav, output_path), warnings)
+
+        # Backgrounds are tiled and mixed under the memory-mapped narration chunk by chunk
+        with wave.open(narration_wav, "rb") as reader:
+            frame_rate = reader.getframerate()
+            sample_width = reader.getsampwidth()
+        with span("export.load_backgrounds", backgrounds=len(backgrounds)):
+            beds = [
+                (load_background_bed(background["path"], frame_rate, sample_width), background["volume"])
+                for background in backgrounds
+            ]
+        automation_points = context.volume_automation if context.background_tracks else None
+        with span("export.mix", backgrounds=len(beds), automation=bool(automation_points)):
+            mixed_wav = mix_beds_into_wav(narration_wav, beds, automation_points=automation_points)
+        with span("export.encode"):
+            return _ok(encode_wav_to_mp3(mixed_wav, output_path), warnings)
+
+    except Exception as e:
+        return _fail(f"Error concatenating audio files: {str(e)}", warnings)
+    finally:
+        remove_intermediate(narration_wav)
+        remove_intermediate(mixed_wav)
+        for path in downloaded:
+            remove_intermediate(path)
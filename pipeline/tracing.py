@@ -0,0 +1,288 @@
+# Lightweight pipeline tracing: timed spans per stage, per-render breakdowns and process-wide metrics
+import os
+import json
+import time
+import atexit
+import logging
+import sqlite3
+import tempfile
+import threading
+import contextvars
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# JSON lines file every span is appended to; empty disables the log
+TRACE_LOG_PATH = os.environ.get("VOICECANVAS_TRACE_LOG", "")
+# Interface and port of the Prometheus text endpoint (/metrics); port 0 disables it
+METRICS_HOST = os.environ.get("VOICECANVAS_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("VOICECANVAS_METRICS_PORT", "0"))
+# SQLite file every process adds its metrics to, so /metrics also covers job and batch render workers;
+# defaults to one in the temp directory when the endpoint is enabled, empty keeps metrics per process
+METRICS_DB_PATH = os.environ.get("VOICECANVAS_METRICS_DB") or (
+    os.path.join(tempfile.gettempdir(), "voicecanvas_metrics.sqlite3") if METRICS_PORT else ""
+)
+# Longest a process holds recorded metrics back from the shared file
+METRICS_FLUSH_SECONDS = 5
+# Upper bounds, in seconds, of the stage duration histogram buckets
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+logger = logging.getLogger(__name__)
+
+_current_trace = contextvars.ContextVar("voicecanvas_trace", default=None)
+_metrics = {}  # stage -> {"count", "seconds", "errors", "bytes", "cache_hits", "buckets"}
+_unflushed = {}  # the same, recorded since the last flush to METRICS_DB_PATH
+_last_flush = time.monotonic()
+_metrics_lock = threading.Lock()
+_log_lock = threading.Lock()
+_metrics_server = None
+_metrics_server_lock = threading.Lock()
+
+# Function to pick a percentile from a list of values
+def percentile(values, fraction):
+    """Return the nearest-rank percentile (fraction between 0 and 1) of values, or 0 for no values."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(1, int(round(fraction * len(ordered) + 0.5 - 1e-9)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class Trace:
+    """Spans recorded while one render or dubbing job runs, including those from its worker threads."""
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self.spans.append(record)
+
+    def breakdown(self):
+        """Return one row per stage, in the order stages first finished, with durations in milliseconds."""
+        with self._lock:
+            spans = list(self.spans)
+        stages = {}
+        for record in spans:
+            stages.setdefault(record["stage"], []).append(record)
+
+        rows = []
+        for stage, records in stages.items():
+            durations = [record["seconds"] * 1000 for record in records]
+            rows.append({
+                "stage": stage,
+                "count": len(records),
+                "total_ms": round(sum(durations), 1),
+                "p50_ms": round(percentile(durations, 0.5), 1),
+                "p95_ms": round(percentile(durations, 0.95), 1),
+                "bytes": sum(record.get("bytes") or 0 for record in records),
+                "cache_hits": sum(1 for record in records if record.get("cache_hit")),
+                "errors": sum(1 for record in records if record.get("error"))
+            })
+        return rows
+
+# Function to collect the spans of one render
+@contextmanager
+def trace(name):
+    """Collect every span recorded inside the block, including in threads started through copy_context, into a Trace."""
+    current = Trace(name)
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        _current_trace.reset(token)
+
+# Function to time one pipeline stage
+@contextmanager
+def span(stage, **attributes):
+    """Time the enclosed block as a span of stage.
+
+    Yields the span's attribute dict so the block can add "bytes", "cache_hit" or "error" once they are known.
+    """
+    record = dict(attributes)
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        record["stage"] = stage
+        record["seconds"] = time.perf_counter() - started
+        _record(record)
+
+def _empty_metrics():
+    return {"count": 0, "seconds": 0.0, "errors": 0, "bytes": 0, "cache_hits": 0, "buckets": [0] * len(DURATION_BUCKETS)}
+
+def _add_record(metrics, record):
+    metrics["count"] += 1
+    metrics["seconds"] += record["seconds"]
+    metrics["errors"] += 1 if record.get("error") else 0
+    metrics["bytes"] += record.get("bytes") or 0
+    metrics["cache_hits"] += 1 if record.get("cache_hit") else 0
+    # Buckets are cumulative, as Prometheus expects
+    for i, bound in enumerate(DURATION_BUCKETS):
+        if record["seconds"] <= bound:
+            metrics["buckets"][i] += 1
+
+def _record(record):
+    with _metrics_lock:
+        _add_record(_metrics.setdefault(record["stage"], _empty_metrics()), record)
+        if METRICS_DB_PATH:
+            _add_record(_unflushed.setdefault(record["stage"], _empty_metrics()), record)
+            due = time.monotonic() - _last_flush >= METRICS_FLUSH_SECONDS
+    if METRICS_DB_PATH and due:
+        flush_metrics()
+
+    current = _current_trace.get()
+    if current is not None:
+        current.add(record)
+
+    if TRACE_LOG_PATH:
+        line = json.dumps(dict(record, trace=current.name if current else None, time=time.time()), default=str)
+        with _log_lock, open(TRACE_LOG_PATH, "a", encoding="utf-8") as log:
+            log.write(line + "\n")
+
+def _connect_metrics_db():
+    connection = sqlite3.connect(METRICS_DB_PATH, timeout=30, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS stage_metrics ("
+        "stage TEXT NOT NULL, name TEXT NOT NULL, value REAL NOT NULL, PRIMARY KEY (stage, name))"
+    )
+    return connection
+
+def _metric_values(metrics):
+    values = [(key, metrics[key]) for key in ("count", "seconds", "errors", "bytes", "cache_hits")]
+    return values + [(f"bucket{i}", count) for i, count in enumerate(metrics["buckets"])]
+
+# Function to share this process's metrics with the other processes
+def flush_metrics():
+    """Add the metrics recorded since the last flush to METRICS_DB_PATH, if set.
+
+    Spans flush on their own every METRICS_FLUSH_SECONDS; workers also call this after each job,
+    since terminated or forked worker processes exit without running atexit handlers.
+    """
+    global _unflushed, _last_flush
+    if not METRICS_DB_PATH:
+        return
+    with _metrics_lock:
+        pending, _unflushed = _unflushed, {}
+        _last_flush = time.monotonic()
+    if not pending:
+        return
+    try:
+        connection = _connect_metrics_db()
+        try:
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                connection.executemany(
+                    "INSERT INTO stage_metrics (stage, name, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT (stage, name) DO UPDATE SET value = value + excluded.value",
+                    [(stage, name, value) for stage, metrics in pending.items() for name, value in _metric_values(metrics)]
+                )
+        finally:
+            connection.close()
+    except sqlite3.Error as e:
+        logger.warning("Could not write metrics to %s: %s", METRICS_DB_PATH, e)
+        # Kept for the next flush rather than lost
+        with _metrics_lock:
+            for stage, metrics in pending.items():
+                merged = _unflushed.setdefault(stage, _empty_metrics())
+                for key in ("count", "seconds", "errors", "bytes", "cache_hits"):
+                    merged[key] += metrics[key]
+                merged["buckets"] = [a + b for a, b in zip(merged["buckets"], metrics["buckets"])]
+
+def _shared_snapshot():
+    flush_metrics()
+    connection = _connect_metrics_db()
+    try:
+        rows = connection.execute("SELECT stage, name, value FROM stage_metrics").fetchall()
+    finally:
+        connection.close()
+    snapshot = {}
+    for stage, name, value in rows:
+        metrics = snapshot.setdefault(stage, _empty_metrics())
+        if name.startswith("bucket"):
+            index = int(name[len("bucket"):])
+            if index < len(DURATION_BUCKETS):
+                metrics["buckets"][index] = int(value)
+        elif name in metrics:
+            metrics[name] = value if name == "seconds" else int(value)
+    return snapshot
+
+# Function to render the metrics in Prometheus text format
+def prometheus_text():
+    """Return stage durations, bytes, cache hits and errors as Prometheus text.
+
+    Covers every process sharing METRICS_DB_PATH when it is set, otherwise this process since it started.
+    """
+    snapshot = None
+    if METRICS_DB_PATH:
+        try:
+            snapshot = _shared_snapshot()
+        except sqlite3.Error as e:
+            logger.warning("Could not read metrics from %s: %s", METRICS_DB_PATH, e)
+    if snapshot is None:
+        with _metrics_lock:
+            snapshot = {stage: dict(metrics, buckets=list(metrics["buckets"])) for stage, metrics in _metrics.items()}
+
+    lines = [
+        "# HELP voicecanvas_stage_seconds Time spent in each pipeline stage.",
+        "# TYPE voicecanvas_stage_seconds histogram"
+    ]
+    for stage, metrics in sorted(snapshot.items()):
+        for bound, count in zip(DURATION_BUCKETS, metrics["buckets"]):
+            lines.append(f'voicecanvas_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+        lines.append(f'voicecanvas_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {metrics["count"]}')
+        lines.append(f'voicecanvas_stage_seconds_sum{{stage="{stage}"}} {metrics["seconds"]:.6f}')
+        lines.append(f'voicecanvas_stage_seconds_count{{stage="{stage}"}} {metrics["count"]}')
+
+    for name, key, help_text in (
+        ("voicecanvas_stage_bytes_total", "bytes", "Audio bytes produced by each pipeline stage."),
+        ("voicecanvas_stage_cache_hits_total", "cache_hits", "Spans of each stage answered from a cache."),
+        ("voicecanvas_stage_errors_total", "errors", "Spans of each stage that failed.")
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for stage, metrics in sorted(snapshot.items()):
+            lines.append(f'{name}{{stage="{stage}"}} {metrics[key]}')
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+# Function to serve the metrics endpoint
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Serve prometheus_text() at /metrics on host and port in a background thread, once per process.
+
+    Returns the server, or None when the port is 0 or already taken, e.g. by the app when a worker imports this.
+    """
+    global _metrics_server
+    if not port:
+        return None
+    with _metrics_server_lock:
+        if _metrics_server is None:
+            try:
+                _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError:
+                return None
+            threading.Thread(target=_metrics_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _metrics_server
+
+# Metrics still held back when the process exits normally
+atexit.register(flush_metrics)
@@ -0,0 +1,61 @@
+import os
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# Maximum number of in-flight TTS requests per provider
+PROVIDER_CONCURRENCY = {
+    "openai": int(os.environ.get("OPENAI_TTS_CONCURRENCY", "4")),
+    "elevenlabs": int(os.environ.get("ELEVENLABS_TTS_CONCURRENCY", "3")),
+}
+DEFAULT_CONCURRENCY = 2
+
+# Function to run TTS jobs concurrently with a per-provider cap
+def generate_lines_concurrently(jobs, synthesize, on_progress=None, provider_limits=None):
+    """Run synthesize(job) for each job across per-provider worker pools and return results in job order."""
+    limits = dict(PROVIDER_CONCURRENCY)
+    if provider_limits:
+        limits.update(provider_limits)
+
+    results = [None] * len(jobs)
+    if not jobs:
+        return results
+
+    # Worker threads inherit the Streamlit script context so the voice
+    # functions can still read session state and report errors; headless callers have none to pass on
+    ctx = get_script_run_ctx(suppress_warning=True)
+    initializer, initargs = (add_script_run_ctx, (None, ctx)) if ctx else (None, ())
+
+    # One pool per provider keeps the cap independent of the other providers
+    executors = {}
+    futures = {}
+    try:
+        for index, job in enumerate(jobs):
+            provider = job.get("provider")
+            if provider not in executors:
+                executors[provider] = ThreadPoolExecutor(
+                    max_workers=max(1, limits.get(provider, DEFAULT_CONCURRENCY)),
+                    thread_name_prefix=f"tts-{provider}",
+                    initializer=initializer,
+                    initargs=initargs
+                )
+            # Each job runs in a copy of the caller's context so tracing spans reach the caller's trace
+            futures[executors[provider].submit(contextvars.copy_context().run, synthesize, job)] = index
+
+        # Progress is reported from the calling thread as lines complete
+        completed = 0
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception:
+                results[index] = None
+            completed += 1
+            if on_progress:
+                on_progress(completed, len(jobs), jobs[index])
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+
+    return results
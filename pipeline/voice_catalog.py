@@ -0,0 +1,141 @@
+import os
+import time
+import hashlib
+import threading
+
+from pipeline.elevenlabs_client import get_elevenlabs_client
+
+# How often shared voice catalogs are refreshed in the background
+VOICE_CATALOG_REFRESH_SECONDS = int(os.environ.get("VOICECANVAS_VOICE_CATALOG_REFRESH_SECONDS", "600"))
+# Catalogs no session has read for this long are dropped instead of refreshed
+VOICE_CATALOG_IDLE_SECONDS = int(os.environ.get("VOICECANVAS_VOICE_CATALOG_IDLE_SECONDS", "3600"))
+
+
+class VoiceCatalog:
+    """Indexed ElevenLabs voice list for one API key, shared by every session using that key."""
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = 0
+        self.error = None
+        self.last_used = time.time()
+        self._lock = threading.Lock()
+        self._set_voices([])
+
+    def _set_voices(self, voices):
+        by_id = {}
+        by_name = {}
+        by_category = {}
+        by_label = {}
+        for voice in voices:
+            by_id[voice["voice_id"]] = voice
+            by_name[voice["name"]] = voice
+            by_category.setdefault(voice.get("category", "N/A"), []).append(voice)
+            for key, value in (voice.get("labels") or {}).items():
+                by_label.setdefault((key, value), []).append(voice)
+
+        # Indexes are swapped in one step so readers never see a half-built catalog
+        self.voices = voices
+        self.by_id = by_id
+        self.by_name = by_name
+        self.by_category = by_category
+        self.by_label = by_label
+        self.name_to_id = {name: voice["voice_id"] for name, voice in by_name.items()}
+
+    def refresh(self):
+        """Fetch the voice list, sending a conditional request when a previous copy exists."""
+        with self._lock:
+            headers = {
+                "xi-api-key": self.api_key,
+                "Content-Type": "application/json"
+            }
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+
+            try:
+                response = get_elevenlabs_client().get("voices", headers=headers)
+            except Exception as e:
+                self.error = str(e)
+                return False
+
+            if response.status_code == 304:
+                self.fetched_at = time.time()
+                self.error = None
+                return True
+
+            if response.status_code != 200:
+                self.error = f"Status code: {response.status_code}. Response: {response.text}"
+                return False
+
+            self._set_voices(response.json().get("voices", []))
+            self.etag = response.headers.get("ETag")
+            self.last_modified = response.headers.get("Last-Modified")
+            self.fetched_at = time.time()
+            self.error = None
+            return True
+
+    def is_loaded(self):
+        return self.fetched_at > 0
+
+    def get_voice_id(self, voice_name):
+        """Return the voice ID for a voice name, or None."""
+        voice = self.by_name.get(voice_name)
+        return voice["voice_id"] if voice else None
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+_refresher = None
+
+def _catalog_id(api_key):
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+def _refresh_loop():
+    while True:
+        time.sleep(VOICE_CATALOG_REFRESH_SECONDS)
+        cutoff = time.time() - VOICE_CATALOG_IDLE_SECONDS
+        with _catalogs_lock:
+            for catalog_id, catalog in list(_catalogs.items()):
+                if catalog.last_used < cutoff:
+                    del _catalogs[catalog_id]
+            catalogs = list(_catalogs.values())
+        for catalog in catalogs:
+            catalog.refresh()
+
+def _ensure_refresher():
+    global _refresher
+    if _refresher is None:
+        _refresher = threading.Thread(target=_refresh_loop, name="voice-catalog-refresh", daemon=True)
+        _refresher.start()
+
+# Function to get the shared voice catalog for an API key
+def get_voice_catalog(api_key, force_refresh=False):
+    """Return the process-wide voice catalog for an API key, loading it on first use."""
+    with _catalogs_lock:
+        catalog = _catalogs.get(_catalog_id(api_key))
+        if catalog is None:
+            catalog = VoiceCatalog(api_key)
+            _catalogs[_catalog_id(api_key)] = catalog
+        catalog.last_used = time.time()
+        _ensure_refresher()
+
+    if force_refresh or not catalog.is_loaded():
+        catalog.refresh()
+    return catalog
+
+# Function to look up an already loaded catalog without network access
+def peek_voice_catalog(api_key):
+    """Return the loaded voice catalog for an API key, or None if it has not been fetched yet."""
+    if not api_key:
+        return None
+    with _catalogs_lock:
+        catalog = _catalogs.get(_catalog_id(api_key))
+        if catalog:
+            catalog.last_used = time.time()
+    if catalog and catalog.is_loaded():
+        return catalog
+    return None